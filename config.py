@@ -4,6 +4,8 @@ import logging
 import os
 import shutil
 import sys
+import tempfile
+import threading
 
 # Resolve application directory for frozen PyInstaller builds.
 # When running as --onefile EXE, CWD may differ from .exe location;
@@ -403,6 +405,7 @@ DEFAULT_CONFIG = {
         "i konkretne sygnały do obserwacji po publikacji.\n\n"
         "Bądź zwięzły (max 400 słów). Używaj konkretnych przykładów."
     ),
+    "profile_batch_api": False,   # opisy AI przez Anthropic Message Batches
     "language": "pl"
 }
 
@@ -468,8 +471,16 @@ def load_config():
     return _apply_env_overrides(data)
 
 
+_save_lock = threading.Lock()
+
+
 def save_config(config):
-    """Zapisz config. Klucze z env nie są zapisywane do pliku."""
+    """Zapisz config. Klucze z env nie są zapisywane do pliku.
+
+    Bezpieczne do wołania z wątków roboczych (zapisy są serializowane).
+    Zapis atomowy: plik tymczasowy + os.replace, więc przerwany zapis
+    nie zostawia uciętego config.json.
+    """
     os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
     to_save = json.loads(json.dumps(config))  # deep copy
     # Nie zapisuj kluczy pochodzących z env — zostaw puste
@@ -477,8 +488,22 @@ def save_config(config):
     for config_key, env_name in ENV_KEY_MAP.items():
         if os.environ.get(env_name, "").strip():
             saved_keys[config_key] = ""
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(to_save, f, ensure_ascii=False, indent=2)
+    with _save_lock:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".config-", suffix=".tmp",
+            dir=os.path.dirname(CONFIG_FILE))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(to_save, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
 
 
 config = load_config()
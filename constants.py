@@ -21,9 +21,11 @@ SCRAPER_CHUNK_SIZE = 8192
 SCRAPER_DEFAULT_MAX_CHARS = 3000
 SCRAPER_MAX_CHARS_PER_SITE = 2000
 SCRAPER_MIN_LINE_LENGTH = 40      # shorter lines stripped as noise
+SCRAPER_MAX_WORKERS = 6           # concurrent DNS checks / page fetches
 
 # ── FX / Market data ─────────────────────────────────────────────
 FX_CACHE_TTL = 600                # 10 min
+FX_FAILURE_TTL = 120              # failed lookups retried after 2 min
 YFINANCE_HISTORY_PERIOD = "5d"
 PRICE_ROUND_DECIMALS = 4
 CHANGE_PCT_ROUND_DECIMALS = 2
@@ -34,8 +36,14 @@ AI_MAX_TOKENS_CHAT = 2048
 AI_MAX_TOKENS_PROFILE = 1024     # instrument profile (short)
 AI_MAX_TOKENS_CALENDAR = 1024    # calendar event analysis (short)
 AI_PROVIDER_TIMEOUT = 120        # seconds — prevent indefinite hangs
+AI_PROVIDER_MAX_RETRIES = 4      # SDK retries 429/5xx/timeouts (backoff + jitter, Retry-After)
 AI_CHAT_HISTORY_MAX_MESSAGES = 20 # sliding window for chat context
 AI_SCRAPED_TEXT_BUDGET = 30000   # max chars of scraped text sent to AI
+AI_PROFILE_MAX_WORKERS = 4       # concurrent instrument-profile requests
+AI_PROVIDER_MAX_CONCURRENT = 4   # batch calls in flight per provider (rate limits)
+AI_BATCH_POLL_MIN_S = 5          # Message Batches status poll, doubled up to max
+AI_BATCH_POLL_MAX_S = 60
+AI_BATCH_MAX_WAIT_S = 3600       # stop polling; the job is resumed on next start
 LEGACY_NEWS_LIMIT = 8             # max news items in legacy prompt
 LEGACY_DESCRIPTION_TRUNCATE = 150
 
@@ -44,6 +52,7 @@ DB_DEFAULT_REPORTS_LIMIT = 50
 DB_REPORT_PREVIEW_LENGTH = 200
 DB_DEFAULT_PRICE_HISTORY_DAYS = 30
 DB_PRICE_HISTORY_MULTIPLIER = 10  # rows = days * multiplier
+DB_ALERTS_CACHE_TTL = 2           # seconds; local writes invalidate at once
 
 # ── News store ────────────────────────────────────────────────────
 NEWS_HASH_LENGTH = 16
@@ -96,6 +105,10 @@ CHART_MA_SHORT_PERIOD = 20        # MA20
 CHART_MA_LONG_PERIOD = 50         # MA50
 CHART_MAX_COMPARE_SYMBOLS = 3
 CHART_SPARSE_DATA_THRESHOLD = 10  # add dot markers below this
+CHART_DATA_CACHE_TTL = 900        # seconds; history reused across period/compare switches
+CHART_DATA_CACHE_TTL_INTRADAY = 60  # 1D / 5D — bars still forming
+CHART_DOWNSAMPLE_THRESHOLD = 2000 # longer line series are reduced with LTTB
+CHART_DOWNSAMPLE_POINTS = 1000    # points kept after downsampling
 
 # ── Pricing cache ─────────────────────────────────────────────────
 PRICING_CACHE_TTL = 86400         # 24 h
@@ -105,5 +118,12 @@ PRICING_TOKENS_PER_UNIT = 1_000_000
 UI_MIN_WINDOW_WIDTH = 1024
 UI_MIN_WINDOW_HEIGHT = 700
 SPINNER_TICK_MS = 100
+OVERLAY_TICK_MS = 200             # analysis overlay animation (cosmetic)
+ENTRY_DEBOUNCE_MS = 200           # custom-model entry: apply after typing pauses
+PROFILE_PROGRESS_TICK_MS = 200    # status refresh during bulk profile generation
+UI_BG_POOL_WORKERS = 4            # persistent threads for chat / profile tasks
+CONFIG_FLUSH_DELAY_MS = 2000      # coalesce UI-state writes to config.json
+ALERTS_POLL_MS = 10000            # alerts from other processes (--auto-analysis)
+SCHEDULER_MAX_SLEEP_S = 300       # re-check cap (suspend / clock changes)
 URL_MASK_PREFIX_LENGTH = 4
 URL_MASK_MIN_LENGTH = 6
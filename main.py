@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+import copy
+import functools
 import logging
+import sqlite3
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import struct
 import zlib
 import base64
@@ -25,25 +28,38 @@ os.chdir(_APP_DIR)
 import matplotlib
 matplotlib.use("TkAgg")
 import matplotlib.pyplot as plt
+import numpy as np
 
 sys.path.insert(0, _APP_DIR)
-from constants import AI_CHAT_HISTORY_MAX_MESSAGES
-from config import load_config, save_config, mask_key, get_api_key
+from constants import (AI_CHAT_HISTORY_MAX_MESSAGES, AI_PROFILE_MAX_WORKERS,
+                       ALERTS_POLL_MS, DB_DEFAULT_REPORTS_LIMIT,
+                       CONFIG_FLUSH_DELAY_MS, SCHEDULER_MAX_SLEEP_S,
+                       ENTRY_DEBOUNCE_MS, OVERLAY_TICK_MS, PROFILE_PROGRESS_TICK_MS,
+                       UI_BG_POOL_WORKERS)
+from config import (load_config, save_config, mask_key, get_api_key,
+                    ENV_KEY_MAP, DEFAULT_CONFIG)
 from modules.market_data import get_all_instruments, get_news, format_market_summary, get_fx_to_usd, get_sparkline_by_timeframe
 from modules.openai_pricing import get_model_cost, refresh_pricing
-from modules.ai_engine import (run_analysis, run_chat, get_available_models,
+from modules.ai_engine import (run_analysis, run_chat, stream_chat, get_available_models,
                                generate_instrument_profile,
+                               generate_instrument_profiles_batch,
+                               resume_profile_message_batch,
                                generate_calendar_event_analysis,
                                _build_instrument_list)
 from modules.database import (
-    save_report, get_reports, get_report_by_id, get_latest_report,
+    save_report, get_history_rows, get_report_analysis,
+    get_report_by_id, get_latest_report,
     save_market_snapshot, get_unseen_alerts, mark_alerts_seen, delete_report,
+    add_alert_listener,
     add_portfolio_position, get_portfolio_positions, delete_portfolio_position,
     get_instrument_profile, save_instrument_profile,
+    save_profile_batch, get_profile_batches, delete_profile_batch,
 )
 from modules.charts import (create_price_chart, create_risk_gauge,
-                            extract_risk_level, fetch_chart_data)
+                            update_risk_gauge, extract_risk_level,
+                            fetch_chart_data)
 from modules.scraper import scrape_all
+from modules.daemon_pool import DaemonThreadPool
 from modules.calendar_data import fetch_calendar, get_event_significance
 from modules.macro_trend import build_macro_payload, format_macro_payload_for_llm
 from modules.ui_helpers import (
@@ -62,6 +78,9 @@ GRAY    = "#313244"
 BTN_BG  = "#313244"
 SUBTEXT = "#7f849c"   # Catppuccin overlay1 – czytelny tekst pomocniczy
 
+_OVERLAY_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+_SCHEDULE_TAG = "scheduled_run"
+
 
 # ── ICON GENERATOR ────────────────────────────────────────────────────────────
 
@@ -120,6 +139,49 @@ def _make_dollar_icon_png(size: int = 48) -> bytes:
             + _chunk(b"IEND", b""))
 
 
+# ── PDF FONT DISCOVERY ───────────────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=1)
+def _discover_utf8_font():
+    """Zwraca (regular, bold) – ścieżki czcionki TTF z obsługą UTF-8.
+
+    Brak czcionki → (None, None); brak wariantu bold → (regular, None).
+    Katalogi czcionek skanowane są raz na proces.
+    """
+    font_dirs = [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+                 # Linux common paths
+                 "/usr/share/fonts/truetype/dejavu",
+                 "/usr/share/fonts/truetype/liberation",
+                 "/usr/share/fonts/TTF"]
+    candidates = [
+        ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
+        ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf"),
+        ("arial.ttf", "arialbd.ttf"),
+    ]
+    for fdir in font_dirs:
+        for regular, bold in candidates:
+            font_path = os.path.join(fdir, regular)
+            if os.path.exists(font_path):
+                bold_path = os.path.join(fdir, bold)
+                return font_path, (bold_path if os.path.exists(bold_path) else None)
+    return None, None
+
+
+class _Latin1Table(dict):
+    """Tablica dla str.translate: znaki spoza latin-1 → "?".
+
+    Wpisy uzupełniane leniwie, tylko dla znaków faktycznie spotkanych.
+    """
+
+    def __missing__(self, codepoint):
+        value = codepoint if codepoint < 0x100 else "?"
+        self[codepoint] = value
+        return value
+
+
+_LATIN1_TABLE = _Latin1Table()
+
+
 class InvestmentAdvisor(tk.Tk):
     def after(self, ms, func=None, *args):
         """Override to silently drop callbacks scheduled after window destruction."""
@@ -146,7 +208,19 @@ class InvestmentAdvisor(tk.Tk):
         self.source_entries = []
         self._tile_widgets = {}
         self._current_chart_fig = None
+        self._chart_canvas = None            # reused across period/symbol switches
         self._chart_chat_history = []
+        self._chart_chat_system_cache = None  # ((prompt, chart_ctx, report), system)
+        self._history_rows = {}              # {report_id: get_history_rows() row}
+        self._config_dirty = False           # UI-state changes not yet on disk
+        self._last_report_date = None        # created_at of dashboard report
+        self._risk_canvas = None             # FigureCanvasTkAgg of the risk gauge
+        self._scheduler_after = None         # after-id of the next schedule check
+        self._pending_status = None          # latest _set_status msg not yet shown
+        self._scheduled_times = None         # times registered with schedule
+        self._status_scheduled = False
+        self._config_flush_after = None
+        self._alerts_after = None            # after-id of the next alerts poll
         self._cal_events = []
         self._cal_request_id = 0
         self._cal_analysis_cache = {}   # {event_key: analysis_text}
@@ -154,6 +228,7 @@ class InvestmentAdvisor(tk.Tk):
         self._click_pending = None   # after-id for single/double click
         self._click_symbol = None
         self._shutting_down = False
+        self._main_tid = threading.get_ident()   # wątek Tk (mainloop)
         self._analysis_overlay_msg = ""
         self._analysis_overlay_step = 0
         self._busy_buttons = []   # buttons to lock during analysis/fetch
@@ -165,15 +240,26 @@ class InvestmentAdvisor(tk.Tk):
         self._spark_cache = {}               # {symbol: [prices]}
         self._spark_fetching = False
         self._spark_last_color = {}          # {symbol: last drawn color}
+        # Ustawiane w _on_close — wątki tła pomijają pozostałą pracę
+        self._shutdown_event = threading.Event()
+        # Stała pula wątków dla czatu i opisów AI (bez tworzenia wątku na żądanie)
+        self._bg_pool = DaemonThreadPool(
+            max_workers=UI_BG_POOL_WORKERS, thread_name_prefix="ia-bg")
+        self._db_writer = DaemonThreadPool(
+            max_workers=1, thread_name_prefix="ia-db")  # jeden pisarz SQLite
         self._build_ui()
         threading.Thread(target=refresh_pricing, daemon=True).start()
         self._autoload_last_report()
         self._start_scheduler()
+        self._resume_profile_batches()
         # Catch-up: jeśli zaplanowana analiza minęła gdy komputer był wyłączony – uruchom od razu
         # (pomijamy gdy app uruchomiona przez cron z --auto-analysis – tam analiza już zaplanowana)
         if "--auto-analysis" not in sys.argv and self._should_run_missed_analysis():
             self.after(5000, self._run_analysis_thread)
         self._check_alerts()
+        # add_alert w tym procesie odświeża od razu; alerty z innych procesów
+        # (--auto-analysis) łapie rzadki poll w _check_alerts
+        add_alert_listener(lambda: self._safe_after(0, self._check_alerts))
         self._start_price_autorefresh()
         self._refresh_sparklines_async()
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -241,6 +327,9 @@ class InvestmentAdvisor(tk.Tk):
         style.map("Treeview",
                   background=[("selected", ACCENT)],
                   foreground=[("selected", BG)])
+        style.configure("Section.TLabel", background=BG, foreground=ACCENT,
+                        font=("Segoe UI", 12, "bold"))
+        style.configure("Section.TSeparator", background=GRAY)
 
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill="both", expand=True, padx=8, pady=8)
@@ -461,6 +550,7 @@ class InvestmentAdvisor(tk.Tk):
             font=("Segoe UI", 16, "bold"), anchor="center")
         self._analysis_overlay_visible = False
         self._analysis_overlay_after = None
+        self._last_overlay_text = None
 
         # Report date label (CEL 3)
         self.report_date_label = tk.Label(
@@ -778,7 +868,7 @@ class InvestmentAdvisor(tk.Tk):
                 self._spark_last_color[symbol] = color
 
         try:
-            with ThreadPoolExecutor(max_workers=8) as ex:
+            with DaemonThreadPool(max_workers=8) as ex:
                 futures = {ex.submit(_fetch, inst): inst for inst in instruments}
                 for future in as_completed(futures):
                     try:
@@ -788,7 +878,7 @@ class InvestmentAdvisor(tk.Tk):
                             # Rysuj od razu po pobraniu – nie czekaj na resztę
                             if not self._shutting_down:
                                 try:
-                                    self.after(0, lambda s=symbol: _draw_one(s))
+                                    self.after(0, functools.partial(_draw_one, symbol))
                                 except RuntimeError:
                                     pass
                         # Gdy fetch zwróci [] (np. stooq / WIG intraday), zachowujemy
@@ -1667,7 +1757,8 @@ class InvestmentAdvisor(tk.Tk):
                 if today_count:
                     status += f"  •  dziś: {today_count}"
                 try:
-                    self.after(0, lambda s=status: self.cal_status.configure(text=s))
+                    self.after(0, functools.partial(
+                        self.cal_status.configure, text=status))
                 except RuntimeError:
                     pass
 
@@ -2023,6 +2114,27 @@ class InvestmentAdvisor(tk.Tk):
                 btn.configure(bg=BTN_BG, fg=FG)
 
     def _draw_chart(self):
+        symbol  = self.chart_symbol_var.get()
+        period  = self.chart_period_var.get()
+        compare = [self.compare_var.get()] if self.compare_var.get() else None
+
+        # Build sources map from instruments config
+        sources_map = {}
+        for inst in self.config_data.get("instruments", []):
+            sources_map[inst["symbol"]] = inst.get("source", "yfinance")
+
+        # Istniejący wykres przerysowujemy w miejscu (bez nowej figury i toolbara)
+        if self._chart_canvas is not None:
+            try:
+                create_price_chart(
+                    self.chart_container, symbol, period, compare,
+                    show_ma=self.show_ma_var.get(),
+                    sources_map=sources_map, canvas=self._chart_canvas)
+                return
+            except (tk.TclError, ValueError, RuntimeError):
+                pass
+        self._chart_canvas = None
+
         # 1. Close the matplotlib figure FIRST (before destroying Tk widgets)
         fig = self._current_chart_fig
         self._current_chart_fig = None
@@ -2039,21 +2151,13 @@ class InvestmentAdvisor(tk.Tk):
             except tk.TclError:
                 pass
 
-        symbol  = self.chart_symbol_var.get()
-        period  = self.chart_period_var.get()
-        compare = [self.compare_var.get()] if self.compare_var.get() else None
-
-        # Build sources map from instruments config
-        sources_map = {}
-        for inst in self.config_data.get("instruments", []):
-            sources_map[inst["symbol"]] = inst.get("source", "yfinance")
-
         try:
             canvas, fig = create_price_chart(
                 self.chart_container, symbol, period, compare,
                 show_ma=self.show_ma_var.get(),
                 sources_map=sources_map)
             self._current_chart_fig = fig
+            self._chart_canvas = canvas
         except Exception as exc:
             # Close any partially created figure
             plt.close("all")
@@ -2299,26 +2403,30 @@ class InvestmentAdvisor(tk.Tk):
         try:
             hist = fetch_chart_data(symbol, period, source)
             if hist is not None and not hist.empty:
-                closes = hist["Close"].dropna()
-                if not closes.empty:
-                    last = closes.iloc[-1]
-                    first = closes.iloc[0]
+                # Jedna konwersja do numpy, dalej statystyki bez narzutu pandas
+                close_arr = hist["Close"].to_numpy(dtype=np.float64)
+                close_arr = close_arr[~np.isnan(close_arr)]
+                if close_arr.size:
+                    last = close_arr[-1]
+                    first = close_arr[0]
                     change_pct = ((last - first) / first) * 100
-                    high = closes.max()
-                    low = closes.min()
+                    high = close_arr.max()
+                    low = close_arr.min()
                     lines.append(f"Cena aktualna: {last:.2f}")
                     lines.append(f"Cena na początku okresu: {first:.2f}")
                     lines.append(f"Zmiana w okresie: {change_pct:+.2f}%")
                     lines.append(f"Najwyższa cena: {high:.2f}")
                     lines.append(f"Najniższa cena: {low:.2f}")
-                    if len(closes) >= 20:
-                        ma20 = closes.rolling(20).mean().iloc[-1]
+                    if close_arr.size >= 20:
+                        ma20 = close_arr[-20:].mean()
                         lines.append(f"MA20: {ma20:.2f}")
-                    if len(closes) >= 50:
-                        ma50 = closes.rolling(50).mean().iloc[-1]
+                    if close_arr.size >= 50:
+                        ma50 = close_arr[-50:].mean()
                         lines.append(f"MA50: {ma50:.2f}")
                     if "Volume" in hist.columns:
-                        avg_vol = hist["Volume"].mean()
+                        vol_arr = hist["Volume"].to_numpy(dtype=np.float64)
+                        vol_arr = vol_arr[~np.isnan(vol_arr)]
+                        avg_vol = vol_arr.mean() if vol_arr.size else 0.0
                         if avg_vol > 0:
                             lines.append(f"Średni wolumen: {avg_vol:,.0f}")
         except (ValueError, TypeError, KeyError, IndexError) as e:
@@ -2327,6 +2435,22 @@ class InvestmentAdvisor(tk.Tk):
 
         return "\n".join(lines)
 
+    @staticmethod
+    def _compose_chart_chat_system(base, chart_ctx, report_text):
+        """Składa prompt systemowy czatu wykresów z kontekstem wykresu i raportu."""
+        system = base or "Jesteś asystentem analizy technicznej. Odpowiadaj po polsku."
+        system += (
+            "\n\nPoniżej znajdują się dane aktualnie wyświetlanego wykresu.\n\n"
+            f"--- WYKRES ---\n{chart_ctx}\n--- KONIEC ---"
+        )
+        if report_text:
+            system += (
+                "\n\nPoniżej znajduje się ostatni raport analizy rynkowej. "
+                "Wykorzystaj go jako dodatkowy kontekst.\n\n"
+                f"--- RAPORT ---\n{report_text}\n--- KONIEC RAPORTU ---"
+            )
+        return system
+
     def _send_chart_chat_message(self):
         msg = self.chart_chat_entry.get().strip()
         if not msg:
@@ -2335,43 +2459,38 @@ class InvestmentAdvisor(tk.Tk):
         self._append_chart_chat("Ty:", msg, "user")
 
         self._chart_chat_history.append({"role": "user", "content": msg})
+        # Sliding window: keep last N messages to bound token usage
+        del self._chart_chat_history[:-AI_CHAT_HISTORY_MAX_MESSAGES]
+        # Niezmienny snapshot dla wątku roboczego (run_chat tylko iteruje)
+        recent = tuple(self._chart_chat_history)
         self.chart_chat_send_btn.configure(state="disabled", text="…")
         self._chart_chat_typing.start("AI analizuje wykres")
 
         def _worker():
-            system = self.config_data.get("chart_chat_prompt", "")
-            if not system:
-                system = "Jesteś asystentem analizy technicznej. Odpowiadaj po polsku."
-            system += "\n"
-
+            base = self.config_data.get("chart_chat_prompt", "")
             chart_ctx = self._get_chart_context()
-            system += (
-                "\nPoniżej znajdują się dane aktualnie wyświetlanego wykresu.\n\n"
-                f"--- WYKRES ---\n{chart_ctx}\n--- KONIEC ---"
-            )
 
             # Dołącz raport analizy (bieżący lub ostatni z bazy)
             report_text = self.current_analysis
             if not report_text:
                 try:
-                    rows = get_reports(limit=1)
-                    if rows:
-                        full = get_report_by_id(rows[0][0])
-                        if full:
-                            # kolumna 5 = analysis
-                            report_text = full[5] or ""
+                    full = get_latest_report()
+                    if full:
+                        # kolumna 5 = analysis
+                        report_text = full[5] or ""
                 except (IndexError, TypeError):
                     pass
-            if report_text:
-                system += (
-                    "\n\nPoniżej znajduje się ostatni raport analizy rynkowej. "
-                    "Wykorzystaj go jako dodatkowy kontekst.\n\n"
-                    f"--- RAPORT ---\n{report_text}\n--- KONIEC RAPORTU ---"
-                )
 
-            # Sliding window: keep last N messages to bound token usage
-            recent = list(
-                self._chart_chat_history[-AI_CHAT_HISTORY_MAX_MESSAGES:])
+            # Prompt systemowy składamy tylko gdy zmienił się wykres lub raport
+            key = (base, chart_ctx, report_text)
+            cached = self._chart_chat_system_cache
+            if cached and cached[0] == key:
+                system = cached[1]
+            else:
+                system = self._compose_chart_chat_system(
+                    base, chart_ctx, report_text)
+                self._chart_chat_system_cache = (key, system)
+
             try:
                 reply = run_chat(
                     self.config_data, recent, system)
@@ -2380,14 +2499,15 @@ class InvestmentAdvisor(tk.Tk):
             self._chart_chat_history.append(
                 {"role": "assistant", "content": reply})
 
-            self.after(0, lambda: self._chart_chat_typing.stop())
-            self.after(0, lambda: self._append_chart_chat(
-                "AI:", reply, "assistant"))
-            self.after(0, lambda: self.chart_chat_send_btn.configure(
-                state="normal", text="Wyślij"))
-            self.after(0, lambda: self.chart_chat_entry.focus_set())
+            def _finish():
+                self._chart_chat_typing.stop()
+                self._append_chart_chat("AI:", reply, "assistant")
+                self.chart_chat_send_btn.configure(state="normal", text="Wyślij")
+                self.chart_chat_entry.focus_set()
 
-        threading.Thread(target=_worker, daemon=True).start()
+            self.after(0, _finish)
+
+        self._bg_pool.submit(_worker)
 
     # ═══════════════════════════════════════
     # HISTORY TAB
@@ -2450,28 +2570,43 @@ class InvestmentAdvisor(tk.Tk):
     def _load_history(self):
         for row in self.history_tree.get_children():
             self.history_tree.delete(row)
-        for r in get_reports(50):
-            rid, created, provider, model, risk, _ = r
+        self._history_rows = {}
+        for row in get_history_rows(50):
+            rid, created_s, prov_model, risk_s = row[:4]
+            self._history_rows[rid] = row
             self.history_tree.insert(
                 "", "end", iid=str(rid),
-                values=(created[:16], f"{provider}/{model}", f"{risk}/10"))
+                values=(created_s, prov_model, risk_s))
+
+    def _insert_history_row(self, row):
+        """Prepend one freshly saved report instead of reloading the list."""
+        rid, created_s, prov_model, risk_s = row[:4]
+        if self.history_tree.exists(str(rid)):
+            return
+        self._history_rows[rid] = row
+        self.history_tree.insert(
+            "", 0, iid=str(rid), values=(created_s, prov_model, risk_s))
+        children = self.history_tree.get_children()
+        for iid in children[DB_DEFAULT_REPORTS_LIMIT:]:
+            self.history_tree.delete(iid)
+            self._history_rows.pop(int(iid), None)
 
     def _on_report_select(self, event):
         sel = self.history_tree.selection()
         if not sel:
             return
-        report = get_report_by_id(int(sel[0]))
-        if report:
+        rid = int(sel[0])
+        meta = self._history_rows.get(rid)
+        report = get_report_analysis(rid)
+        if meta and report:
+            analysis, inp, out = report
             self.report_preview.configure(state="normal")
-            self.report_preview.delete("1.0", "end")
-            self.report_preview.insert("end", report[5])
+            self.report_preview.replace("1.0", "end", analysis or "")
             self.report_preview.configure(state="disabled")
             # Show token info for this report
-            created_at = report[1] or ""
-            provider = report[2] or ""
-            model = report[3] or ""
-            inp = report[7] if len(report) > 7 else 0
-            out = report[8] if len(report) > 8 else 0
+            created_at = meta[1] or ""
+            provider = meta[4] or ""
+            model = meta[5] or ""
             usage_info = {
                 "provider": provider, "model": model,
                 "input_tokens": inp or 0, "output_tokens": out or 0,
@@ -2487,8 +2622,12 @@ class InvestmentAdvisor(tk.Tk):
             return
         if messagebox.askyesno("Usuń raport",
                                 "Czy na pewno usunąć wybrany raport?"):
-            delete_report(int(sel[0]))
-            self._load_history()
+            rid = int(sel[0])
+            if delete_report(rid) is not None:
+                self.history_tree.delete(sel[0])
+                self._history_rows.pop(rid, None)
+            else:
+                self._load_history()
 
     # ═══════════════════════════════════════
     # SETTINGS TAB
@@ -2618,6 +2757,19 @@ class InvestmentAdvisor(tk.Tk):
         return frame
 
     def _build_settings_tab(self):
+        """Odkłada budowę zakładki Ustawienia do pierwszego jej otwarcia."""
+        self._settings_built = False
+        self.notebook.bind("<<NotebookTabChanged>>",
+                           self._on_main_tab_change, add="+")
+
+    def _on_main_tab_change(self, event):
+        if self._settings_built:
+            return
+        if self.notebook.select() == str(self.tab_settings):
+            self._settings_built = True
+            self._build_settings_content()
+
+    def _build_settings_content(self):
         # Przycisk zapisu na dole (poza notebookiem, zawsze widoczny)
         tk.Button(
             self.tab_settings, text="💾 Zapisz ustawienia", bg=GREEN, fg=BG,
@@ -2662,11 +2814,10 @@ class InvestmentAdvisor(tk.Tk):
     # ── Settings sub-builders ─────────────────────────────────────
     @staticmethod
     def _settings_section(parent, text):
-        tk.Label(parent, text=text, bg=BG, fg=ACCENT,
-                 font=("Segoe UI", 12, "bold")
-                 ).pack(anchor="w", padx=16, pady=(16, 4))
-        tk.Frame(parent, bg=GRAY, height=1).pack(
-            fill="x", padx=16, pady=(0, 8))
+        ttk.Label(parent, text=text, style="Section.TLabel"
+                  ).pack(anchor="w", padx=16, pady=(16, 4))
+        ttk.Separator(parent, orient="horizontal", style="Section.TSeparator"
+                      ).pack(fill="x", padx=16, pady=(0, 8))
 
     @staticmethod
     def _settings_entry_row(parent, label, var, show=""):
@@ -2683,11 +2834,11 @@ class InvestmentAdvisor(tk.Tk):
     def _build_settings_api_keys(self, inner):
         self._settings_section(inner, "🔑 Klucze API")
         self._key_from_env = {}
+        env = os.environ
         for kn in ("newsdata", "openai", "anthropic", "openrouter"):
-            from config import ENV_KEY_MAP
             env_name = ENV_KEY_MAP.get(kn, "")
-            self._key_from_env[kn] = bool(
-                env_name and os.environ.get(env_name, "").strip())
+            val = env.get(env_name) if env_name else None
+            self._key_from_env[kn] = bool(val and val.strip())
 
         def _key_display(name):
             val = self.config_data["api_keys"].get(name, "")
@@ -2747,7 +2898,9 @@ class InvestmentAdvisor(tk.Tk):
             highlightbackground=GRAY, highlightthickness=1)
         self._custom_model_entry.pack(side="left", padx=4)
         self._custom_model_entry.bind(
-            "<KeyRelease>", lambda e: self._on_custom_model_change())
+            "<KeyRelease>", lambda e: self._debounced_after(
+                "_custom_model_debounce", ENTRY_DEBOUNCE_MS,
+                self._on_custom_model_change))
 
         self._update_model_list()
 
@@ -2800,7 +2953,9 @@ class InvestmentAdvisor(tk.Tk):
             highlightbackground=GRAY, highlightthickness=1)
         self._chat_custom_model_entry.pack(side="left", padx=4)
         self._chat_custom_model_entry.bind(
-            "<KeyRelease>", lambda e: self._on_chat_custom_model_change())
+            "<KeyRelease>", lambda e: self._debounced_after(
+                "_chat_custom_model_debounce", ENTRY_DEBOUNCE_MS,
+                self._on_chat_custom_model_change))
 
         self._update_chat_model_list()
 
@@ -2895,6 +3050,13 @@ class InvestmentAdvisor(tk.Tk):
             font=("Segoe UI", 9))
         self._gen_profiles_status.pack(side="left", padx=(8, 0))
 
+        self.v_profile_batch_api = tk.BooleanVar(
+            value=bool(self.config_data.get("profile_batch_api", False)))
+        self._make_checkbutton(
+            inner, "Generuj opisy przez Message Batches (Anthropic: ~50% taniej, "
+            "wynik po kilku minutach)", self.v_profile_batch_api, font_size=9
+        ).pack(anchor="w", padx=16, pady=(0, 6))
+
     def _build_settings_sources(self, inner):
         self._settings_section(inner, "🌐 Źródła danych (strony www)")
         tk.Label(
@@ -3078,27 +3240,28 @@ class InvestmentAdvisor(tk.Tk):
         row_frame = tk.Frame(self.inst_frame, bg=BG)
         row_frame.pack(fill="x", pady=2)
 
-        v_sym  = tk.StringVar(value=inst.get("symbol", ""))
-        v_name = tk.StringVar(value=inst.get("name", ""))
-        v_cat  = tk.StringVar(value=inst.get("category", "Akcje"))
-        v_src  = tk.StringVar(value=inst.get("source", "yfinance"))
-
-        tk.Entry(row_frame, textvariable=v_sym, bg=BG2, fg=FG,
-                 insertbackground=FG, relief="flat", font=("Segoe UI", 9),
-                 highlightbackground=GRAY, highlightthickness=1,
-                 width=12).pack(side="left", padx=(0, 4))
-        tk.Entry(row_frame, textvariable=v_name, bg=BG2, fg=FG,
-                 insertbackground=FG, relief="flat", font=("Segoe UI", 9),
-                 highlightbackground=GRAY, highlightthickness=1,
-                 width=18).pack(side="left", padx=(0, 4))
-        ttk.Combobox(
-            row_frame, textvariable=v_cat, width=12, state="readonly",
-            values=["Akcje", "Krypto", "Forex", "Surowce", "Inne"]
-        ).pack(side="left", padx=(0, 4))
-        ttk.Combobox(
-            row_frame, textvariable=v_src, width=10, state="readonly",
-            values=["yfinance", "coingecko", "stooq"]
-        ).pack(side="left", padx=(0, 4))
+        e_sym = tk.Entry(row_frame, bg=BG2, fg=FG,
+                         insertbackground=FG, relief="flat", font=("Segoe UI", 9),
+                         highlightbackground=GRAY, highlightthickness=1,
+                         width=12)
+        e_sym.insert(0, inst.get("symbol", ""))
+        e_sym.pack(side="left", padx=(0, 4))
+        e_name = tk.Entry(row_frame, bg=BG2, fg=FG,
+                          insertbackground=FG, relief="flat", font=("Segoe UI", 9),
+                          highlightbackground=GRAY, highlightthickness=1,
+                          width=18)
+        e_name.insert(0, inst.get("name", ""))
+        e_name.pack(side="left", padx=(0, 4))
+        cb_cat = ttk.Combobox(
+            row_frame, width=12, state="readonly",
+            values=["Akcje", "Krypto", "Forex", "Surowce", "Inne"])
+        cb_cat.set(inst.get("category", "Akcje"))
+        cb_cat.pack(side="left", padx=(0, 4))
+        cb_src = ttk.Combobox(
+            row_frame, width=10, state="readonly",
+            values=["yfinance", "coingecko", "stooq"])
+        cb_src.set(inst.get("source", "yfinance"))
+        cb_src.pack(side="left", padx=(0, 4))
 
         tk.Button(row_frame, text="↑", bg=BTN_BG, fg=FG,
                   font=("Segoe UI", 9), relief="flat", cursor="hand2",
@@ -3112,13 +3275,13 @@ class InvestmentAdvisor(tk.Tk):
                   ).pack(side="left", padx=(0, 2))
 
         def remove():
-            self.inst_entries.remove((row_frame, v_sym, v_name, v_cat, v_src))
+            self.inst_entries.remove((row_frame, e_sym, e_name, cb_cat, cb_src))
             row_frame.destroy()
 
         tk.Button(row_frame, text="✖", bg=BTN_BG, fg=RED,
                   font=("Segoe UI", 9), relief="flat", cursor="hand2",
                   padx=6, command=remove).pack(side="left")
-        self.inst_entries.append((row_frame, v_sym, v_name, v_cat, v_src))
+        self.inst_entries.append((row_frame, e_sym, e_name, cb_cat, cb_src))
 
     def _move_instrument(self, row_frame, direction):
         """Move instrument row up (-1) or down (+1) in the list."""
@@ -3134,14 +3297,10 @@ class InvestmentAdvisor(tk.Tk):
             return
         self.inst_entries[idx], self.inst_entries[new_idx] = \
             self.inst_entries[new_idx], self.inst_entries[idx]
-        self._repack_instruments()
-
-    def _repack_instruments(self):
-        """Repack instrument rows in current list order."""
-        for entry in self.inst_entries:
-            entry[0].pack_forget()
-        for entry in self.inst_entries:
-            entry[0].pack(fill="x", pady=2)
+        # Zamień tylko dwa sąsiednie wiersze – bez przepakowywania całej listy
+        lo = min(idx, new_idx)
+        self.inst_entries[lo][0].pack(
+            fill="x", pady=2, before=self.inst_entries[lo + 1][0])
 
     def _generate_missing_profiles(self):
         """Generate AI profiles for all instruments that don't have one yet."""
@@ -3162,35 +3321,15 @@ class InvestmentAdvisor(tk.Tk):
         self._gen_profiles_status.configure(
             text=f"0/{total} — rozpoczynam…", fg=YELLOW)
 
-        def _worker():
-            done = 0
-            errors = 0
-            for inst in missing:
-                sym = inst["symbol"]
-                name = inst.get("name", sym)
-                cat = inst.get("category", "Inne")
-                self.after(0, lambda d=done, s=sym: (
-                    self._gen_profiles_status.configure(
-                        text=f"{d}/{total} — generuję: {s}…")))
-                try:
-                    text = generate_instrument_profile(
-                        self.config_data, sym, name, cat)
-                    save_instrument_profile(sym, text)
-                    done += 1
-                except (ConnectionError, TimeoutError, ValueError, KeyError) as e:
-                    logging.getLogger(__name__).debug("Profile gen %s failed: %s", sym, e)
-                    errors += 1
-                    done += 1
-
-            msg = f"Gotowe: {total - errors}/{total}"
+        def _finish(updated, errors):
+            msg = f"Gotowe: {updated}/{total}"
             if errors:
                 msg += f"  ({errors} błędów)"
-            self.after(0, lambda: self._gen_profiles_status.configure(
-                text=msg, fg=GREEN if not errors else YELLOW))
-            self.after(0, lambda: self._gen_profiles_btn.configure(
-                state="normal"))
+            self._gen_profiles_status.configure(
+                text=msg, fg=GREEN if not errors else YELLOW)
+            self._gen_profiles_btn.configure(state="normal")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._generate_profiles_parallel(missing, _finish)
 
     def _refresh_all_profiles(self):
         """Regenerate ALL AI instrument profiles (overwrite existing cache)."""
@@ -3212,38 +3351,112 @@ class InvestmentAdvisor(tk.Tk):
         self._gen_profiles_status.configure(
             text=f"0/{total} — rozpoczynam…", fg=YELLOW)
 
-        def _worker():
-            import logging
-            _log = logging.getLogger(__name__)
-            updated = 0
-            errors = 0
-            for inst in instruments:
-                sym = inst["symbol"]
-                name = inst.get("name", sym)
-                cat = inst.get("category", "Inne")
-                self.after(0, lambda d=updated + errors, s=sym: (
-                    self._gen_profiles_status.configure(
-                        text=f"{d}/{total} — generuję: {s}…")))
-                try:
-                    text = generate_instrument_profile(
-                        self.config_data, sym, name, cat)
-                    save_instrument_profile(sym, text)
-                    updated += 1
-                except (ConnectionError, TimeoutError, ValueError, KeyError) as exc:
-                    _log.error("Profile refresh %s failed: %s", sym, exc)
-                    errors += 1
-
+        def _finish(updated, errors):
             msg = f"Zaktualizowano {updated} opisów."
             if errors:
                 msg += f"  ({errors} błędów)"
-            self.after(0, lambda: self._gen_profiles_status.configure(
-                text=msg, fg=GREEN if not errors else YELLOW))
-            self.after(0, lambda: self._gen_profiles_btn.configure(
-                state="normal"))
-            self.after(0, lambda: self._refresh_profiles_btn.configure(
-                state="normal"))
+            self._gen_profiles_status.configure(
+                text=msg, fg=GREEN if not errors else YELLOW)
+            self._gen_profiles_btn.configure(state="normal")
+            self._refresh_profiles_btn.configure(state="normal")
+
+        self._generate_profiles_parallel(instruments, _finish)
+
+    def _generate_profiles_parallel(self, instruments, on_finish):
+        """Generuje opisy AI równolegle (ograniczona pula wątków).
+
+        Postęp jest odczytywany przez cykliczny tick zamiast osobnego
+        ``self.after`` na każdy instrument. *on_finish(updated, errors)*
+        jest wywoływane w wątku głównym po zakończeniu wszystkich zadań.
+        """
+        total = len(instruments)
+        progress = {"done": 0, "errors": 0, "current": ""}
+        lock = threading.Lock()
 
-        threading.Thread(target=_worker, daemon=True).start()
+        def _started(sym):
+            with lock:
+                progress["current"] = sym
+
+        def _finished(sym, text, exc):
+            if exc is None:
+                try:
+                    save_instrument_profile(sym, text)
+                except sqlite3.Error as e:
+                    logging.getLogger(__name__).error(
+                        "Saving profile %s failed: %s", sym, e)
+                    exc = e
+            with lock:
+                progress["done"] += 1
+                if exc is not None:
+                    progress["errors"] += 1
+
+        def _tick():
+            with lock:
+                done, current = progress["done"], progress["current"]
+            if done >= total:
+                return
+            self._gen_profiles_status.configure(
+                text=f"{done}/{total} — generuję: {current}…")
+            self.after(PROFILE_PROGRESS_TICK_MS, _tick)
+
+        def _worker():
+            try:
+                max_workers = int(self.config_data.get("profile_max_workers")
+                                  or AI_PROFILE_MAX_WORKERS)
+                generate_instrument_profiles_batch(
+                    self.config_data, instruments, max_workers=max_workers,
+                    on_start=_started, on_result=_finished,
+                    cancel=self._shutdown_event,
+                    on_batch=self._on_profile_batch)
+            except Exception:
+                logging.getLogger(__name__).exception(
+                    "Profile generation aborted")
+            finally:
+                # Zawsze domykamy: instrumenty bez wyniku liczą się jako błędy,
+                # _tick się zatrzymuje, przyciski wracają do stanu normal
+                with lock:
+                    errors = progress["errors"] + total - progress["done"]
+                    progress["done"] = total
+                self._safe_after(0, lambda: on_finish(total - errors, errors))
+
+        self.after(PROFILE_PROGRESS_TICK_MS, _tick)
+        self._bg_pool.submit(_worker)
+
+    def _on_profile_batch(self, batch_id, symbols):
+        """Zapisuje / usuwa oczekujące zadanie Message Batches (wątek tła)."""
+        try:
+            if symbols is None:
+                delete_profile_batch(batch_id)
+            else:
+                save_profile_batch(batch_id, symbols)
+        except sqlite3.Error as e:
+            logging.getLogger(__name__).error(
+                "Profile batch %s bookkeeping failed: %s", batch_id, e)
+
+    def _resume_profile_batches(self):
+        """Dokończ zadania Message Batches przerwane zamknięciem aplikacji."""
+        pending = get_profile_batches()
+        if not pending:
+            return
+
+        def _save(sym, text, exc):
+            if exc is None:
+                save_instrument_profile(sym, text)
+
+        def _worker():
+            for batch_id, symbols in pending:
+                if self._shutdown_event.is_set():
+                    return
+                try:
+                    resume_profile_message_batch(
+                        self.config_data, batch_id, symbols, on_result=_save,
+                        cancel=self._shutdown_event,
+                        on_batch=self._on_profile_batch)
+                except Exception:
+                    logging.getLogger(__name__).exception(
+                        "Resuming profile batch %s failed", batch_id)
+
+        self._bg_pool.submit(_worker)
 
     def _add_source_row(self, url=""):
         row_frame = tk.Frame(self.sources_frame, bg=BG)
@@ -3276,6 +3489,13 @@ class InvestmentAdvisor(tk.Tk):
             else:
                 btn.configure(bg=BTN_BG, fg=FG)
 
+    def _debounced_after(self, attr, ms, fn):
+        """Planuje *fn* po *ms* ms, anulując poprzednie wywołanie zapisane w *attr*."""
+        pending = getattr(self, attr, None)
+        if pending:
+            self.after_cancel(pending)
+        setattr(self, attr, self.after(ms, lambda: (setattr(self, attr, None), fn())))
+
     def _on_custom_model_change(self):
         custom = self.v_custom_model.get().strip()
         if custom:
@@ -3336,27 +3556,22 @@ class InvestmentAdvisor(tk.Tk):
                     self.v_chat_model.set(models[0])
 
     def _reset_prompt(self):
-        from config import DEFAULT_CONFIG
         self.prompt_text.delete("1.0", "end")
         self.prompt_text.insert("end", DEFAULT_CONFIG["prompt"])
 
     def _reset_chat_prompt(self):
-        from config import DEFAULT_CONFIG
         self.chat_prompt_text.delete("1.0", "end")
         self.chat_prompt_text.insert("end", DEFAULT_CONFIG["chat_prompt"])
 
     def _reset_chart_chat_prompt(self):
-        from config import DEFAULT_CONFIG
         self.chart_chat_prompt_text.delete("1.0", "end")
         self.chart_chat_prompt_text.insert("end", DEFAULT_CONFIG["chart_chat_prompt"])
 
     def _reset_profile_prompt(self):
-        from config import DEFAULT_CONFIG
         self.profile_prompt_text.delete("1.0", "end")
         self.profile_prompt_text.insert("end", DEFAULT_CONFIG["profile_prompt"])
 
     def _reset_calendar_event_prompt(self):
-        from config import DEFAULT_CONFIG
         self.calendar_event_prompt_text.delete("1.0", "end")
         self.calendar_event_prompt_text.insert(
             "end", DEFAULT_CONFIG["calendar_event_prompt"])
@@ -3398,6 +3613,11 @@ class InvestmentAdvisor(tk.Tk):
         ).pack(side="right", padx=(0, 8))
 
     def _save_settings(self):
+        # Stan sprzed zapisu — przebudowujemy tylko to, co faktycznie się zmieniło
+        sched = self.config_data["schedule"]
+        old_instruments = self.config_data.get("instruments", [])
+        old_schedule = (sched.get("enabled"), list(sched.get("times", [])))
+
         # Nie nadpisuj kluczy zarządzanych przez env
         for kn, var in (("newsdata", self.v_newsdata), ("openai", self.v_openai),
                         ("anthropic", self.v_anthropic), ("openrouter", self.v_openrouter)):
@@ -3409,6 +3629,7 @@ class InvestmentAdvisor(tk.Tk):
         self.config_data["chat_provider"] = self.v_chat_provider.get()
         chat_custom = self.v_chat_custom_model.get().strip()
         self.config_data["chat_model"] = chat_custom if chat_custom else self.v_chat_model.get()
+        self.config_data["profile_batch_api"] = self.v_profile_batch_api.get()
         self.config_data["schedule"]["enabled"] = self.v_sched_enabled.get()
         self.config_data["schedule"]["times"] = [
             t.strip() for t in self.v_times.get().split(",") if t.strip()]
@@ -3419,13 +3640,14 @@ class InvestmentAdvisor(tk.Tk):
         self.config_data["calendar_event_prompt"] = self.calendar_event_prompt_text.get("1.0", "end").strip()
 
         instruments = []
-        for _, v_sym, v_name, v_cat, v_src in self.inst_entries:
-            if v_sym.get().strip():
+        for _, e_sym, e_name, cb_cat, cb_src in self.inst_entries:
+            sym = e_sym.get().strip()
+            if sym:
                 instruments.append({
-                    "symbol":   v_sym.get().strip(),
-                    "name":     v_name.get().strip(),
-                    "category": v_cat.get(),
-                    "source":   v_src.get(),
+                    "symbol":   sym,
+                    "name":     e_name.get().strip(),
+                    "category": cb_cat.get(),
+                    "source":   cb_src.get(),
                 })
         self.config_data["instruments"] = instruments
 
@@ -3433,27 +3655,32 @@ class InvestmentAdvisor(tk.Tk):
                    if var.get().strip()]
         self.config_data["sources"] = sources
 
-        save_config(self.config_data)
-        self._refresh_chart_symbols()
-        self._start_scheduler()
-        self._populate_tile_placeholders(instruments)
+        self._config_dirty = False
+        self._queue_config_save()
+        if instruments != old_instruments:
+            self._refresh_chart_symbols()
+            self._populate_tile_placeholders(instruments)
+
+            inst_names = [f"{i['name']} ({i['symbol']})" for i in instruments]
+            for pw in self._port_widgets.values():
+                cb = pw.get("inst_cb")
+                vi = pw.get("v_inst")
+                if cb:
+                    cb["values"] = inst_names
+                if vi and inst_names:
+                    vi.set(inst_names[0])
 
         # Autostart systemu
         self._set_autostart(self.v_autostart.get())
 
-        # Cron – harmonogram uruchamiania aplikacji
         times = self.config_data["schedule"]["times"]
-        self._update_cron_schedule(self.v_sched_enabled.get(), times)
-
-        inst_names = [f"{i['name']} ({i['symbol']})" for i in instruments]
-        for pw in self._port_widgets.values():
-            cb = pw.get("inst_cb")
-            vi = pw.get("v_inst")
-            if cb:
-                cb["values"] = inst_names
-            if vi and inst_names:
-                vi.set(inst_names[0])
+        if (self.v_sched_enabled.get(), times) != old_schedule:
+            self._start_scheduler()
+            # Cron – harmonogram uruchamiania aplikacji
+            self._update_cron_schedule(self.v_sched_enabled.get(), times)
 
+        # Jeden przebieg layoutu przed modalnym oknem zamiast kilku pośrednich
+        self.update_idletasks()
         messagebox.showinfo("Zapisano", "Ustawienia zostały zapisane!")
 
     # ═══════════════════════════════════════
@@ -3472,6 +3699,42 @@ class InvestmentAdvisor(tk.Tk):
             w.configure(state="disabled")
             w.see("end")
 
+    def _begin_chat_stream(self):
+        """Open an 'AI:' block that streamed deltas are appended to."""
+        self._chat_typing.stop()
+        for w in [self.chat_display] + self._chat_extra_displays:
+            w.configure(state="normal")
+            w.insert("end", "AI:\n", "label")
+            w.mark_set("chat_stream", "end-1c")
+            w.mark_gravity("chat_stream", "left")
+            w.configure(state="disabled")
+            w.see("end")
+
+    def _append_chat_delta(self, chunk):
+        """Append a raw streamed delta (no markdown re-render)."""
+        for w in [self.chat_display] + self._chat_extra_displays:
+            if "chat_stream" not in w.mark_names():
+                continue
+            w.configure(state="normal")
+            w.insert("end", chunk, "assistant")
+            w.configure(state="disabled")
+            w.see("end")
+
+    def _end_chat_stream(self, reply):
+        """Replace the streamed plain text with the markdown-rendered reply."""
+        for w in [self.chat_display] + self._chat_extra_displays:
+            w.configure(state="normal")
+            if "chat_stream" in w.mark_names():
+                w.delete("chat_stream", "end")
+                w.mark_unset("chat_stream")
+            else:
+                # popup opened mid-stream — no partial block to replace
+                w.insert("end", "AI:\n", "label")
+            insert_markdown(w, reply, base_tag="assistant")
+            w.insert("end", "\n\n", "assistant")
+            w.configure(state="disabled")
+            w.see("end")
+
     def _clear_chat(self):
         self._chat_history.clear()
         for w in [self.chat_display] + self._chat_extra_displays:
@@ -3591,18 +3854,32 @@ class InvestmentAdvisor(tk.Tk):
 
             # Sliding window: keep last N messages to bound token usage
             recent = list(self._chat_history[-AI_CHAT_HISTORY_MAX_MESSAGES:])
+            parts = []
             try:
-                reply = run_chat(self.config_data, recent, system)
+                for chunk in stream_chat(self.config_data, recent, system):
+                    if not parts:
+                        self.after(0, self._begin_chat_stream)
+                    parts.append(chunk)
+                    self.after(0, functools.partial(
+                        self._append_chat_delta, chunk))
+                reply = "".join(parts)
             except Exception as exc:
-                reply = f"Błąd połączenia: {exc}"
+                reply = "".join(parts) + f"\n\nBłąd połączenia: {exc}"
             self._chat_history.append({"role": "assistant", "content": reply})
+            streamed = bool(parts)
 
-            self.after(0, lambda: self._chat_typing.stop())
-            self.after(0, lambda: self._append_chat("AI:", reply, "assistant"))
-            self.after(0, lambda: send_btn.configure(state="normal", text="Wyślij"))
-            self.after(0, lambda: entry_widget.focus_set())
+            def _finish():
+                if streamed:
+                    self._end_chat_stream(reply)
+                else:
+                    self._chat_typing.stop()
+                    self._append_chat("AI:", reply, "assistant")
+                send_btn.configure(state="normal", text="Wyślij")
+                entry_widget.focus_set()
+
+            self.after(0, _finish)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._bg_pool.submit(_worker)
 
     # ═══════════════════════════════════════
     # AUTOLOAD LAST REPORT
@@ -3632,6 +3909,7 @@ class InvestmentAdvisor(tk.Tk):
             output_tokens = report[8] if len(report) > 8 else 0
 
             self.current_analysis = analysis
+            self._last_report_date = created_at or None
 
             self.analysis_text.configure(state="normal")
             self.analysis_text.delete("1.0", "end")
@@ -3645,16 +3923,7 @@ class InvestmentAdvisor(tk.Tk):
             }
             self._update_token_info(usage_info, report_date=created_at)
 
-            # Update risk gauge
-            for w in self.gauge_frame.winfo_children():
-                w.destroy()
-            try:
-                canvas, _ = create_risk_gauge(self.gauge_frame, risk)
-                canvas.get_tk_widget().pack()
-            except (tk.TclError, ValueError, RuntimeError):
-                tk.Label(self.gauge_frame, text=f"Ryzyko: {risk}/10",
-                         bg=BG, fg=YELLOW,
-                         font=("Segoe UI", 14, "bold")).pack(pady=8)
+            self._show_risk_gauge(risk)
 
             # Select this report in the history tree if present
             rid_str = str(rid)
@@ -3680,14 +3949,18 @@ class InvestmentAdvisor(tk.Tk):
         self.set_busy(True, "Pobieranie danych…")
         threading.Thread(target=self._run_analysis, daemon=True).start()
 
-    def _run_analysis(self):
-        try:
-            cfg = self.config_data
-            self.set_busy(True, "Pobieranie danych instrumentów…")
-            market_data = get_all_instruments(cfg.get("instruments", []))
+    def _gather_analysis_inputs(self, cfg):
+        """Pobiera równolegle dane rynkowe, newsy (macro-trend) i treść stron www.
 
-            self.set_busy(True, "Pobieranie newsów (macro-trend engine)…")
-            newsdata_key = get_api_key(cfg, "newsdata")
+        Zwraca (market_data, (macro_text, news), scraped_text). Czas trwania
+        to najdłuższy z trzech etapów zamiast ich sumy.
+        """
+        newsdata_key = get_api_key(cfg, "newsdata")
+        sources = cfg.get("sources", [])
+        trusted = cfg.get("trusted_domains")
+        instruments = cfg.get("instruments", [])
+
+        def _news():
             macro_text = ""
             news = []
             if newsdata_key:
@@ -3695,7 +3968,6 @@ class InvestmentAdvisor(tk.Tk):
                     macro_payload = build_macro_payload(newsdata_key)
                     macro_text = format_macro_payload_for_llm(macro_payload)
                 except Exception as e:
-                    import logging
                     logging.getLogger(__name__).warning(
                         "Macro-trend fallback: %s", e)
             # Fallback: legacy news if macro engine fails
@@ -3704,31 +3976,55 @@ class InvestmentAdvisor(tk.Tk):
                     newsdata_key,
                     query="geopolitics economy markets finance",
                     language="en")
+            return macro_text, news
+
+        def _scrape():
+            if not sources:
+                return ""
+            return scrape_all(
+                sources,
+                max_chars_per_site=2000,
+                trusted_domains=trusted)
+
+        with DaemonThreadPool(max_workers=3) as ex:
+            f_market = ex.submit(get_all_instruments, instruments)
+            f_news = ex.submit(_news)
+            f_scrape = ex.submit(_scrape)
+            return f_market.result(), f_news.result(), f_scrape.result()
 
-            scraped_text = ""
-            sources = cfg.get("sources", [])
-            if sources:
-                self.set_busy(True,
-                    f"Pobieranie treści z {len(sources)} źródeł www…")
-                scraped_text = scrape_all(
-                    sources,
-                    max_chars_per_site=2000,
-                    trusted_domains=cfg.get("trusted_domains"))
+    def _run_analysis(self):
+        try:
+            # Migawka konfiguracji: zapis ustawień w trakcie analizy nie
+            # zmienia instrumentów/modelu w połowie przebiegu
+            cfg = copy.deepcopy(self.config_data)
+            provider = cfg["ai_provider"]
+            model    = cfg["ai_model"]
+            self.set_busy(True, "Pobieranie danych (instrumenty, newsy, www)…")
+            market_data, (macro_text, news), scraped_text = \
+                self._gather_analysis_inputs(cfg)
 
             self.set_busy(True, "Generowanie analizy AI…")
             summary  = format_market_summary(market_data)
+            streamed = []
+
+            def _on_token(delta):
+                # Surowy tekst na bieżąco; markdown renderuje _update_dashboard
+                if not streamed:
+                    self._safe_after(0, self._begin_analysis_stream)
+                streamed.append(delta)
+                self._safe_after(0, functools.partial(
+                    self._append_analysis_delta, delta))
+
             result   = run_analysis(cfg, summary, news, scraped_text,
                                     macro_text=macro_text,
-                                    market_data=market_data)
+                                    market_data=market_data,
+                                    on_token=_on_token)
             # result is a dict: {text, input_tokens, output_tokens}
             analysis     = result.get("text", "")
             input_tokens = result.get("input_tokens", 0)
             output_tokens = result.get("output_tokens", 0)
             risk     = extract_risk_level(analysis)
 
-            provider = cfg["ai_provider"]
-            model    = cfg["ai_model"]
-
             self.current_analysis    = analysis
             self.current_market_data = market_data
 
@@ -3746,37 +4042,63 @@ class InvestmentAdvisor(tk.Tk):
                 analysis, risk, market_data, usage_info=usage_info,
                 report_date=now_str))
 
-            try:
-                save_report(provider, model,
-                            summary, analysis, risk,
-                            input_tokens=input_tokens,
-                            output_tokens=output_tokens)
-                save_market_snapshot(market_data)
-            except Exception as db_exc:
-                import logging as _log
-                _log.getLogger(__name__).warning("Błąd zapisu do bazy: %s", db_exc)
+            def _persist():
+                try:
+                    rid = save_report(provider, model,
+                                      summary, analysis, risk,
+                                      input_tokens=input_tokens,
+                                      output_tokens=output_tokens)
+                    # Ten sam kształt co wiersze get_history_rows()
+                    history_row = (rid, now_str[:16], f"{provider}/{model}",
+                                   f"{risk}/10", provider, model)
+                    self._safe_after(0, functools.partial(
+                        self._insert_history_row, history_row))
+                    save_market_snapshot(market_data)
+                except Exception as db_exc:
+                    logging.getLogger(__name__).warning(
+                        "Błąd zapisu do bazy: %s", db_exc)
+
+            # Zapisy do SQLite idą przez jednego pisarza, poza ścieżką krytyczną
+            self._db_writer.submit(_persist)
 
             # Zapisz czas zakończenia analizy – używany do catch-up przy kolejnym starcie
             from datetime import datetime as _dt2
             self.config_data["schedule"]["last_analysis"] = _dt2.now().isoformat()
-            save_config(self.config_data)
+            self._queue_config_save()
 
         except Exception as exc:
             import traceback
             traceback.print_exc()
             err_msg = str(exc)
             try:
-                self.after(0, lambda m=err_msg: self._show_analysis_error(m))
+                self.after(0, functools.partial(
+                    self._show_analysis_error, err_msg))
             except RuntimeError:
                 pass
         finally:
+            def _done():
+                self._apply_busy(False, "Gotowy")
+                self.analyze_btn.configure(text="▶  Uruchom Analizę")
+
             try:
-                self.set_busy(False, "Gotowy")
-                self.after(0, lambda: self.analyze_btn.configure(
-                    text="▶  Uruchom Analizę"))
+                self._safe_after(0, _done)
             except RuntimeError:
                 pass
 
+    def _begin_analysis_stream(self):
+        """Odsłoń pole analizy i wyczyść je pod streamowany tekst."""
+        self._hide_analysis_overlay()
+        self.analysis_text.configure(state="normal")
+        self.analysis_text.delete("1.0", "end")
+        self.analysis_text.configure(state="disabled")
+
+    def _append_analysis_delta(self, chunk):
+        """Append a raw streamed delta to the analysis area."""
+        self.analysis_text.configure(state="normal")
+        self.analysis_text.insert("end", chunk)
+        self.analysis_text.configure(state="disabled")
+        self.analysis_text.see("end")
+
     def _show_analysis_error(self, message):
         """Display a fatal analysis error in the analysis text area."""
         self.analysis_text.configure(state="normal")
@@ -3787,6 +4109,7 @@ class InvestmentAdvisor(tk.Tk):
 
     def _update_dashboard(self, analysis, risk, market_data, usage_info=None,
                           report_date=None):
+        self._last_report_date = report_date
         self.analysis_text.configure(state="normal")
         self.analysis_text.delete("1.0", "end")
         insert_markdown(self.analysis_text, analysis)
@@ -3796,19 +4119,32 @@ class InvestmentAdvisor(tk.Tk):
         self._update_price_tiles(market_data)
         self._refresh_portfolio()
 
+        self._show_risk_gauge(risk)
+
+        self._set_status(f"Analiza zakończona  •  {len(analysis)} znaków")
+
+    def _show_risk_gauge(self, risk):
+        """Move the needle of the existing gauge; build it only once."""
+        canvas = self._risk_canvas
+        if canvas is not None:
+            try:
+                update_risk_gauge(canvas, risk)
+                return
+            except (tk.TclError, ValueError, RuntimeError, IndexError):
+                plt.close(canvas.figure)
+                self._risk_canvas = None
+
         for w in self.gauge_frame.winfo_children():
             w.destroy()
         try:
             canvas, _ = create_risk_gauge(self.gauge_frame, risk)
             canvas.get_tk_widget().pack()
+            self._risk_canvas = canvas
         except (tk.TclError, ValueError, RuntimeError):
             tk.Label(self.gauge_frame, text=f"Ryzyko: {risk}/10",
                      bg=BG, fg=YELLOW,
                      font=("Segoe UI", 14, "bold")).pack(pady=8)
 
-        self._set_status(f"Analiza zakończona  •  {len(analysis)} znaków")
-        self._load_history()
-
     @staticmethod
     def _fmt_cost(val):
         """Format a small dollar/PLN amount with adaptive precision."""
@@ -3886,102 +4222,62 @@ class InvestmentAdvisor(tk.Tk):
 
         # Try to register a UTF-8 capable font
         use_utf8 = False
-        font_dirs = []
-        windir = os.environ.get("WINDIR", "C:\\Windows")
-        font_dirs.append(os.path.join(windir, "Fonts"))
-        # Linux common paths
-        for p in ("/usr/share/fonts/truetype/dejavu",
-                  "/usr/share/fonts/truetype/liberation",
-                  "/usr/share/fonts/TTF"):
-            font_dirs.append(p)
-
-        for fdir in font_dirs:
-            if use_utf8:
-                break
+        font_path, bold_path = _discover_utf8_font()
+        if font_path:
             try:
-                candidates = [
-                    ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
-                    ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf"),
-                    ("arial.ttf", "arialbd.ttf"),
-                ]
-                for regular, bold in candidates:
-                    font_path = os.path.join(fdir, regular)
-                    bold_path = os.path.join(fdir, bold)
-                    if os.path.exists(font_path):
-                        pdf.add_font("UTFFont", "", font_path, uni=True)
-                        if os.path.exists(bold_path):
-                            pdf.add_font("UTFFont", "B", bold_path, uni=True)
-                        use_utf8 = True
-                        break
+                pdf.add_font("UTFFont", "", font_path, uni=True)
+                if bold_path:
+                    pdf.add_font("UTFFont", "B", bold_path, uni=True)
+                use_utf8 = True
             except (OSError, RuntimeError):
-                continue
+                use_utf8 = False
 
         from zoneinfo import ZoneInfo as _ZI
         date_str = report_date or _dt.now(
             _ZI("Europe/Warsaw")).strftime("%Y-%m-%d %H:%M")
 
+        # Font switching — pdf.set_font only when style/size actually change
+        base_font = "UTFFont" if use_utf8 else "Helvetica"
+        current_font = [None]
+
+        def set_font(style, size):
+            if current_font[0] != (style, size):
+                pdf.set_font(base_font, style, size)
+                current_font[0] = (style, size)
+
+        # prefix → (ln before, font size, line height)
+        headings = {"### ": (0, 11, 5), "## ": (2, 12, 6), "# ": (3, 14, 7)}
+
         # Title
-        if use_utf8:
-            pdf.set_font("UTFFont", "B", 16)
-        else:
-            pdf.set_font("Helvetica", "B", 16)
+        set_font("B", 16)
         pdf.cell(effective_w, 10, "Investment Advisor - Raport",
                  ln=True, align="C")
 
         # Date
-        if use_utf8:
-            pdf.set_font("UTFFont", "", 9)
-        else:
-            pdf.set_font("Helvetica", size=9)
+        set_font("", 9)
         pdf.cell(effective_w, 6, date_str, ln=True, align="C")
         pdf.ln(6)
 
         # Body — with basic markdown heading support
         for line in text.split("\n"):
             if not use_utf8:
-                line = line.encode("latin-1", "replace").decode("latin-1")
+                line = line.translate(_LATIN1_TABLE)
             stripped = line.strip()
             pdf.set_x(pdf.l_margin)
 
             if not stripped:
                 pdf.ln(4)
-            elif stripped.startswith("### "):
-                if use_utf8:
-                    pdf.set_font("UTFFont", "B", 11)
-                else:
-                    pdf.set_font("Helvetica", "B", 11)
-                pdf.multi_cell(effective_w, 5, stripped[4:])
-                if use_utf8:
-                    pdf.set_font("UTFFont", "", 10)
-                else:
-                    pdf.set_font("Helvetica", size=10)
-            elif stripped.startswith("## "):
-                pdf.ln(2)
-                if use_utf8:
-                    pdf.set_font("UTFFont", "B", 12)
-                else:
-                    pdf.set_font("Helvetica", "B", 12)
-                pdf.multi_cell(effective_w, 6, stripped[3:])
-                if use_utf8:
-                    pdf.set_font("UTFFont", "", 10)
-                else:
-                    pdf.set_font("Helvetica", size=10)
-            elif stripped.startswith("# "):
-                pdf.ln(3)
-                if use_utf8:
-                    pdf.set_font("UTFFont", "B", 14)
-                else:
-                    pdf.set_font("Helvetica", "B", 14)
-                pdf.multi_cell(effective_w, 7, stripped[2:])
-                if use_utf8:
-                    pdf.set_font("UTFFont", "", 10)
-                else:
-                    pdf.set_font("Helvetica", size=10)
+                continue
+            prefix = stripped[:stripped.find(" ") + 1] if stripped[0] == "#" else ""
+            spec = headings.get(prefix)
+            if spec:
+                gap, size, line_h = spec
+                if gap:
+                    pdf.ln(gap)
+                set_font("B", size)
+                pdf.multi_cell(effective_w, line_h, stripped[len(prefix):])
             else:
-                if use_utf8:
-                    pdf.set_font("UTFFont", "", 10)
-                else:
-                    pdf.set_font("Helvetica", size=10)
+                set_font("", 10)
                 pdf.multi_cell(effective_w, 5, line)
 
         return pdf
@@ -3996,14 +4292,19 @@ class InvestmentAdvisor(tk.Tk):
         from zoneinfo import ZoneInfo as _ZI
         from tkinter import filedialog
 
-        # Determine report date for default filename
+        # Determine report date for default filename — the dashboard already
+        # knows it; hit the DB only if it was never recorded
         report_date_str = None
-        try:
-            report = get_latest_report()
-            if report and report[1]:
-                report_date_str = report[1][:16]  # "YYYY-MM-DD HH:MM"
-        except (IndexError, TypeError):
-            pass
+        created_at = self._last_report_date
+        if not created_at:
+            try:
+                report = get_latest_report()
+                if report:
+                    created_at = report[1]
+            except (IndexError, TypeError):
+                pass
+        if created_at:
+            report_date_str = created_at[:16]  # "YYYY-MM-DD HH:MM"
 
         if report_date_str:
             # Parse stored date (treat naive as Warsaw)
@@ -4033,16 +4334,21 @@ class InvestmentAdvisor(tk.Tk):
 
         # Save last-used directory for next time
         self.config_data["last_export_dir"] = os.path.dirname(path)
-        save_config(self.config_data)
+        self._mark_config_dirty()
 
-        try:
-            pdf = self._build_pdf(self.current_analysis,
-                                  report_date=report_date_str)
-            pdf.output(path)
-            messagebox.showinfo("PDF",
-                                f"Raport zapisany:\n{os.path.abspath(path)}")
-        except Exception as exc:
-            messagebox.showerror("Błąd PDF", str(exc))
+        analysis = self.current_analysis
+
+        def _generate():
+            try:
+                pdf = self._build_pdf(analysis, report_date=report_date_str)
+                pdf.output(path)
+                self.after(0, lambda: messagebox.showinfo(
+                    "PDF", f"Raport zapisany:\n{os.path.abspath(path)}"))
+            except Exception as exc:
+                self.after(0, functools.partial(
+                    messagebox.showerror, "Błąd PDF", str(exc)))
+
+        threading.Thread(target=_generate, daemon=True).start()
 
     def _export_history_pdf(self):
         """Export selected history report to PDF via Save As dialog."""
@@ -4076,8 +4382,8 @@ class InvestmentAdvisor(tk.Tk):
                 self.after(0, lambda: messagebox.showinfo(
                     "PDF", f"Raport zapisany:\n{os.path.abspath(path)}"))
             except Exception as exc:
-                self.after(0, lambda: messagebox.showerror(
-                    "Błąd PDF", str(exc)))
+                self.after(0, functools.partial(
+                    messagebox.showerror, "Błąd PDF", str(exc)))
 
         threading.Thread(target=_generate, daemon=True).start()
 
@@ -4085,13 +4391,22 @@ class InvestmentAdvisor(tk.Tk):
     # ALERTS
     # ═══════════════════════════════════════
     def _check_alerts(self):
+        """Odśwież licznik alertów — przy starcie, po add_alert i co ALERTS_POLL_MS."""
         if self._shutting_down:
             return
+        # Jeden łańcuch pollingu: wywołanie z listenera przesuwa następny poll
+        if self._alerts_after is not None:
+            try:
+                self.after_cancel(self._alerts_after)
+            except (tk.TclError, ValueError):
+                pass
+        self._alerts_after = self._safe_after(ALERTS_POLL_MS, self._check_alerts)
+        # get_unseen_alerts jest cache'owane — kliknięcie dzwonka tuż potem
+        # (_show_alerts) nie odpytuje bazy drugi raz
         alerts = get_unseen_alerts()
         if alerts:
             self.alert_btn.configure(
                 fg=RED, text=f"🔔 Alerty ({len(alerts)})")
-        self._safe_after(60000, self._check_alerts)
 
     def _show_alerts(self):
         alerts = get_unseen_alerts()
@@ -4104,13 +4419,21 @@ class InvestmentAdvisor(tk.Tk):
         if not alerts:
             tk.Label(win, text="Brak nowych alertów", bg=BG, fg=FG,
                      font=("Segoe UI", 12)).pack(pady=40)
+            return
+        # Jeden widget Text z tagami zamiast 2 ramek + 2 etykiet na alert —
+        # okno otwiera się od razu także przy setkach alertów
+        text = scrolledtext.ScrolledText(
+            win, bg=BG2, fg=FG, font=("Segoe UI", 9), relief="flat",
+            wrap="word", padx=8, pady=6)
+        text.pack(fill="both", expand=True, padx=12, pady=8)
+        text.tag_configure("header", foreground=ACCENT,
+                           font=("Segoe UI", 9, "bold"), spacing1=6)
+        text.tag_configure("body", foreground=FG, spacing3=6)
+        args = []
         for a in alerts:
-            f = tk.Frame(win, bg=BG2, pady=6)
-            f.pack(fill="x", padx=12, pady=4)
-            tk.Label(f, text=f"[{a[1][:16]}] {a[2]}", bg=BG2, fg=ACCENT,
-                     font=("Segoe UI", 9, "bold")).pack(anchor="w", padx=8)
-            tk.Label(f, text=a[3], bg=BG2, fg=FG, font=("Segoe UI", 9),
-                     wraplength=460).pack(anchor="w", padx=8)
+            args += [f"[{a[1][:16]}] {a[2]}\n", "header", f"{a[3]}\n", "body"]
+        text.insert("end", *args)
+        text.configure(state="disabled")
 
     # ═══════════════════════════════════════
     # SCHEDULER
@@ -4142,30 +4465,69 @@ class InvestmentAdvisor(tk.Tk):
         return False
 
     def _start_scheduler(self):
-        schedule.clear()
-        if self.config_data["schedule"].get("enabled"):
-            for t in self.config_data["schedule"].get("times", []):
-                schedule.every().day.at(t).do(self._run_analysis_thread)
-
-        def runner():
-            while not self._shutting_down:
-                try:
-                    schedule.run_pending()
-                except Exception:
-                    logging.getLogger(__name__).exception(
-                        "Scheduler tick failed")
-                time.sleep(30)
+        """(Re)register scheduled analyses; no-op when the times are unchanged."""
+        sched = self.config_data["schedule"]
+        times = tuple(sched.get("times", [])) if sched.get("enabled") else ()
+        if times == self._scheduled_times:
+            return
+        # Czyścimy tylko własne zadania (tag), nie cały globalny harmonogram
+        schedule.clear(_SCHEDULE_TAG)
+        for t in times:
+            schedule.every().day.at(t).do(
+                self._run_analysis_thread).tag(_SCHEDULE_TAG)
+        self._scheduled_times = times
+        self._arm_scheduler()
+
+    def _arm_scheduler(self):
+        """Wake exactly when the next job is due (no polling thread)."""
+        if self._scheduler_after is not None:
+            try:
+                self.after_cancel(self._scheduler_after)
+            except (tk.TclError, ValueError):
+                pass
+            self._scheduler_after = None
+        idle = schedule.idle_seconds()
+        if idle is None:
+            return
+        delay = min(max(idle, 0.0), SCHEDULER_MAX_SLEEP_S)
+        self._scheduler_after = self.after(
+            int(delay * 1000) + 1, self._scheduler_tick)
 
-        threading.Thread(target=runner, daemon=True).start()
+    def _scheduler_tick(self):
+        self._scheduler_after = None
+        try:
+            schedule.run_pending()
+        except Exception:
+            logging.getLogger(__name__).exception("Scheduler tick failed")
+        self._arm_scheduler()
 
     def _set_status(self, msg):
-        """Thread-safe status update - schedules UI change on main thread."""
+        """Thread-safe status update - schedules UI change on main thread.
+
+        Rapid updates are coalesced: only the newest message is applied
+        per event-loop turn.
+        """
         if self._shutting_down:
             return
+        self._pending_status = msg
+        if threading.get_ident() == self._main_tid:
+            self.status_label.configure(text=msg)
+            return
+        if self._status_scheduled:
+            return
+        self._status_scheduled = True
         try:
-            self.after(0, lambda: self.status_label.configure(text=msg))
+            self.after(0, self._flush_status)
         except RuntimeError:
-            pass
+            self._status_scheduled = False
+
+    def _flush_status(self):
+        """Main-thread part of :meth:`_set_status`."""
+        # Najpierw zdejmij flagę — komunikat dopisany w trakcie zaplanuje nowy flush
+        self._status_scheduled = False
+        msg = self._pending_status
+        if msg is not None:
+            self.status_label.configure(text=msg)
 
     def _show_analysis_overlay(self, message=""):
         """Show a pulsing overlay on the analysis text area."""
@@ -4173,6 +4535,7 @@ class InvestmentAdvisor(tk.Tk):
         if not self._analysis_overlay_visible:
             self._analysis_overlay_visible = True
             self._analysis_overlay_step = 0
+            self._last_overlay_text = None
             self._analysis_overlay.place(
                 relx=0, rely=0, relwidth=1, relheight=1)
             self._analysis_overlay.lift()
@@ -4193,48 +4556,58 @@ class InvestmentAdvisor(tk.Tk):
         """Animate the overlay text with a pulsing dot pattern."""
         if not self._analysis_overlay_visible:
             return
-        _OVERLAY_FRAMES = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
         frame = _OVERLAY_FRAMES[self._analysis_overlay_step % len(_OVERLAY_FRAMES)]
         msg = self._analysis_overlay_msg or "Analizuję"
+        text = f"{frame}  {msg}  {frame}"
         try:
-            self._analysis_overlay.configure(text=f"{frame}  {msg}  {frame}")
+            # Okno zminimalizowane / inna zakładka — nie przerysowuj, tylko odczekaj
+            if text != self._last_overlay_text and self._analysis_overlay.winfo_viewable():
+                self._analysis_overlay.configure(text=text)
+                self._last_overlay_text = text
         except (tk.TclError, RuntimeError):
             self._analysis_overlay_visible = False
             return
         self._analysis_overlay_step += 1
-        self._analysis_overlay_after = self._safe_after(120, self._tick_overlay)
+        self._analysis_overlay_after = self._safe_after(
+            OVERLAY_TICK_MS, self._tick_overlay)
 
     def set_busy(self, is_busy, message="Pracuję…"):
         """Lock/unlock buttons and start/stop spinner animation.
 
-        Thread-safe: schedules all UI changes on the main thread.
+        Thread-safe: schedules all UI changes on the main thread
+        (applied directly when already called from it).
         """
-        def _apply():
-            if is_busy:
-                for btn in self._busy_buttons:
-                    try:
-                        btn.configure(state="disabled")
-                    except tk.TclError:
-                        pass
-                if self._spinner:
-                    self._spinner.start(message)
-                self._show_analysis_overlay(message)
-            else:
-                for btn in self._busy_buttons:
-                    try:
-                        btn.configure(state="normal")
-                    except tk.TclError:
-                        pass
-                if self._spinner:
-                    self._spinner.stop(message)
-                self._hide_analysis_overlay()
         if self._shutting_down:
             return
+        if threading.get_ident() == self._main_tid:
+            self._apply_busy(is_busy, message)
+            return
         try:
-            self.after(0, _apply)
+            self.after(0, self._apply_busy, is_busy, message)
         except RuntimeError:
             pass
 
+    def _apply_busy(self, is_busy, message):
+        """Main-thread part of :meth:`set_busy`."""
+        if is_busy:
+            for btn in self._busy_buttons:
+                try:
+                    btn.configure(state="disabled")
+                except tk.TclError:
+                    pass
+            if self._spinner:
+                self._spinner.start(message)
+            self._show_analysis_overlay(message)
+        else:
+            for btn in self._busy_buttons:
+                try:
+                    btn.configure(state="normal")
+                except tk.TclError:
+                    pass
+            if self._spinner:
+                self._spinner.stop(message)
+            self._hide_analysis_overlay()
+
     # ═══════════════════════════════════════
     # POPUP WINDOWS (double-click)
     # ═══════════════════════════════════════
@@ -4496,29 +4869,63 @@ class InvestmentAdvisor(tk.Tk):
         except tk.TclError:
             return None
 
+    def _mark_config_dirty(self):
+        """Schedule a coalesced config write for minor UI-state changes."""
+        self._config_dirty = True
+        if self._config_flush_after is None:
+            self._config_flush_after = self.after(
+                CONFIG_FLUSH_DELAY_MS, self._flush_config_if_dirty)
+
+    def _flush_config_if_dirty(self):
+        self._config_flush_after = None
+        if self._config_dirty:
+            self._config_dirty = False
+            self._queue_config_save()
+
+    def _queue_config_save(self):
+        """Write a config snapshot on the single writer thread (in order)."""
+        snapshot = copy.deepcopy(self.config_data)
+        try:
+            self._db_writer.submit(save_config, snapshot)
+        except RuntimeError:   # pisarz już zamknięty (trwa zamykanie)
+            save_config(snapshot)
+
     def _on_close(self):
         """Clean shutdown: close all matplotlib figures before destroying Tk."""
         self._shutting_down = True
+        self._shutdown_event.set()
         # Cancel known recurring after-callbacks
         for attr in ("_analysis_overlay_after", "_click_pending",
-                     "_popup_resize_after"):
+                     "_popup_resize_after", "_config_flush_after",
+                     "_scheduler_after", "_alerts_after"):
             after_id = getattr(self, attr, None)
             if after_id is not None:
                 try:
                     self.after_cancel(after_id)
                 except (tk.TclError, ValueError):
                     pass
+        self._flush_config_if_dirty()
         try:
             if self._current_chart_fig:
                 plt.close(self._current_chart_fig)
                 self._current_chart_fig = None
-            plt.close("all")
+            # Nic do zamknięcia, jeśli żaden wykres nie został otwarty
+            if plt.get_fignums():
+                plt.close("all")
         except (ValueError, RuntimeError):
             pass
-        schedule.clear()
+        schedule.clear(_SCHEDULE_TAG)
+        self._bg_pool.shutdown(wait=False, cancel_futures=True)
+        # Bez czekania: pisarz woła after(), więc join na wątku Tk groziłby
+        # zakleszczeniem. Zakolejkowane zapisy kończy close_writers().
+        self._db_writer.shutdown(wait=False)
         # Short delay lets daemon threads see _shutting_down before widgets vanish
         self.after(50, self.destroy)
 
+    def close_writers(self):
+        """Drain queued report/config writes; call after mainloop() returns."""
+        self._db_writer.shutdown(wait=True)
+
 
 if __name__ == "__main__":
     # Configure crash logging to file for frozen EXE (console may close instantly)
@@ -4538,6 +4945,7 @@ if __name__ == "__main__":
             # Uruchomiona przez cron – poczekaj na załadowanie UI, następnie uruchom analizę
             app.after(4000, app._run_analysis_thread)
         app.mainloop()
+        app.close_writers()   # nie gub zapisanego raportu ani configu
     except Exception as exc:
         import traceback
         traceback.print_exc()
@@ -1,4 +1,12 @@
+import atexit
+import functools
+import hashlib
+import io
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
 import anthropic
 import openai
 from datetime import datetime
@@ -6,30 +14,61 @@ from zoneinfo import ZoneInfo
 import sys, os
 
 _WARSAW = ZoneInfo("Europe/Warsaw")
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+_ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+if _ROOT_DIR not in sys.path:
+    sys.path.insert(0, _ROOT_DIR)
 from config import get_api_key
+from modules.daemon_pool import DaemonThreadPool
 
 logger = logging.getLogger(__name__)
 
 from constants import (
     AI_MAX_TOKENS_ANALYSIS, AI_MAX_TOKENS_CHAT,
     AI_MAX_TOKENS_PROFILE, AI_MAX_TOKENS_CALENDAR,
-    AI_PROVIDER_TIMEOUT, AI_SCRAPED_TEXT_BUDGET,
+    AI_PROVIDER_TIMEOUT, AI_PROVIDER_MAX_RETRIES, AI_SCRAPED_TEXT_BUDGET,
+    AI_PROFILE_MAX_WORKERS, AI_PROVIDER_MAX_CONCURRENT,
+    AI_BATCH_POLL_MIN_S, AI_BATCH_POLL_MAX_S, AI_BATCH_MAX_WAIT_S,
     LEGACY_NEWS_LIMIT, LEGACY_DESCRIPTION_TRUNCATE,
 )
 
 # ── Provider configuration ────────────────────────────────────────
-_PROVIDER_DEFAULTS = {
-    "anthropic":   {"key": "anthropic",   "model": "claude-opus-4-6",
-                    "env": "ANTHROPIC_API_KEY"},
-    "openai":      {"key": "openai",      "model": "o3-mini",
-                    "env": "OPENAI_API_KEY"},
-    "openrouter":  {"key": "openrouter",  "model": "openai/gpt-4o",
-                    "env": "OPENROUTER_API_KEY",
-                    "base_url": "https://openrouter.ai/api/v1"},
+@dataclass(frozen=True)
+class ProviderInfo:
+    """Static provider settings, with user-facing strings precomputed."""
+    key: str
+    model: str
+    env: str
+    base_url: str | None = None
+    display_name: str = ""
+    no_key_msg: str = ""
+
+
+def _provider_info(name, key, model, env, base_url=None):
+    display_name = name.capitalize()
+    return ProviderInfo(
+        key=key, model=model, env=env, base_url=base_url,
+        display_name=display_name,
+        no_key_msg=(f"Brak klucza API {display_name}. "
+                    f"Ustaw {env} lub dodaj klucz w Ustawieniach."))
+
+
+_PROVIDER_INFO = {
+    "anthropic":  _provider_info("anthropic", "anthropic", "claude-opus-4-6",
+                                 "ANTHROPIC_API_KEY"),
+    "openai":     _provider_info("openai", "openai", "o3-mini",
+                                 "OPENAI_API_KEY"),
+    "openrouter": _provider_info("openrouter", "openrouter", "openai/gpt-4o",
+                                 "OPENROUTER_API_KEY",
+                                 base_url="https://openrouter.ai/api/v1"),
 }
 
 
+def _display_name(provider):
+    """Provider name as shown in error messages."""
+    info = _PROVIDER_INFO.get(provider)
+    return info.display_name if info else provider.capitalize()
+
+
 # ── Unified provider call ─────────────────────────────────────────
 def _openai_token_kwarg(model: str, max_tokens: int) -> dict:
     """Return the correct token-limit kwarg for the given OpenAI model.
@@ -45,66 +84,201 @@ def _openai_token_kwarg(model: str, max_tokens: int) -> dict:
     return {"max_completion_tokens" if use_completion else "max_tokens": max_tokens}
 
 
+# {(provider, base_url): (api_key, client)} — one client per provider keeps
+# the httpx connection pool (TCP+TLS) alive between calls.
+_CLIENT_CACHE = {}
+_client_lock = threading.Lock()
+
+
+def _make_client(provider, api_key):
+    """Return the SDK client for *provider*, reusing it while the key is unchanged."""
+    info = _PROVIDER_INFO.get(provider)
+    base_url = info.base_url if info else None
+    cache_key = (provider, base_url)
+    with _client_lock:
+        cached = _CLIENT_CACHE.get(cache_key)
+        if cached and cached[0] == api_key:
+            return cached[1]
+        if cached:
+            # Zmiana klucza: with_options dzieli ten sam httpx.Client,
+            # więc otwarte połączenia (TCP+TLS) do API zostają w puli
+            client = cached[1].with_options(api_key=api_key)
+        elif provider == "anthropic":
+            client = anthropic.Anthropic(
+                api_key=api_key, timeout=AI_PROVIDER_TIMEOUT,
+                max_retries=AI_PROVIDER_MAX_RETRIES)
+        else:
+            kwargs = {"api_key": api_key, "timeout": AI_PROVIDER_TIMEOUT,
+                      "max_retries": AI_PROVIDER_MAX_RETRIES}
+            if base_url:
+                kwargs["base_url"] = base_url
+            client = openai.OpenAI(**kwargs)
+        _CLIENT_CACHE[cache_key] = (api_key, client)
+        return client
+
+
+@atexit.register
+def _close_clients():
+    """Close pooled SDK connections at interpreter exit."""
+    with _client_lock:
+        clients = [client for _, client in _CLIENT_CACHE.values()]
+        _CLIENT_CACHE.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _openai_messages(system_prompt, messages):
+    """Prepend the system prompt as an OpenAI-style system message."""
+    oai_messages = []
+    if system_prompt:
+        oai_messages.append({"role": "system", "content": system_prompt})
+    oai_messages.extend(messages)
+    return oai_messages
+
+
 def _call_provider(provider, api_key, model, system_prompt,
-                   messages, max_tokens=AI_MAX_TOKENS_ANALYSIS):
-    """Call Anthropic or OpenAI-compatible API. Returns (text, usage)."""
+                   messages, max_tokens=AI_MAX_TOKENS_ANALYSIS, on_token=None):
+    """Call Anthropic or OpenAI-compatible API. Returns (text, usage).
+
+    With *on_token* the response is streamed and each text delta is passed
+    to ``on_token(delta)`` as it arrives; the return value is the same.
+    """
+    if on_token is not None:
+        parts, usage = [], []
+        for delta in _stream_provider(provider, api_key, model, system_prompt,
+                                      messages, max_tokens, usage_out=usage):
+            parts.append(delta)
+            on_token(delta)
+        return "".join(parts), (usage[-1] if usage else None)
+    client = _make_client(provider, api_key)
+    call = _PROVIDER_CALLS.get(provider, _call_openai_compat)
+    return call(client, model, system_prompt, messages, max_tokens)
+
+
+def _anthropic_system(system_prompt):
+    """System prompt as a cacheable block (prompt caching, ~10% input price).
+
+    The system prompt is the stable prefix of every request; prompts below
+    the model's minimum cacheable length are simply sent uncached.
+    """
+    if not system_prompt:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt,
+             "cache_control": {"type": "ephemeral"}}]
+
+
+def _call_anthropic(client, model, system_prompt, messages, max_tokens):
+    """Anthropic Messages API call. Returns (text, usage)."""
+    response = client.messages.create(
+        model=model, max_tokens=max_tokens,
+        system=_anthropic_system(system_prompt), messages=messages)
+    return response.content[0].text, getattr(response, "usage", None)
+
+
+def _call_openai_compat(client, model, system_prompt, messages, max_tokens):
+    """OpenAI-compatible chat completion (OpenAI, OpenRouter). Returns (text, usage)."""
+    oai_messages = _openai_messages(system_prompt, messages)
+    token_kwarg = _openai_token_kwarg(model, max_tokens)
+    try:
+        response = client.chat.completions.create(
+            model=model, messages=oai_messages, **token_kwarg)
+    except openai.BadRequestError as e:
+        # Fallback: swap between max_tokens / max_completion_tokens
+        if "max_completion_tokens" in str(e) or "max_tokens" in str(e):
+            alt_key = ("max_tokens" if "max_completion_tokens" in token_kwarg
+                       else "max_completion_tokens")
+            logger.info("Retrying %s with %s instead", model, alt_key)
+            response = client.chat.completions.create(
+                model=model, messages=oai_messages, **{alt_key: max_tokens})
+        else:
+            raise
+    return response.choices[0].message.content, getattr(response, "usage", None)
+
+
+# Providers not listed here speak the OpenAI-compatible API
+_PROVIDER_CALLS = {
+    "anthropic": _call_anthropic,
+    "openai": _call_openai_compat,
+    "openrouter": _call_openai_compat,
+}
+
+
+def _stream_provider(provider, api_key, model, system_prompt,
+                     messages, max_tokens=AI_MAX_TOKENS_CHAT, usage_out=None):
+    """Streaming variant of _call_provider. Yields text deltas.
+
+    If *usage_out* is a list, the final usage object is appended to it.
+    """
+    client = _make_client(provider, api_key)
     if provider == "anthropic":
-        client = anthropic.Anthropic(
-            api_key=api_key, timeout=AI_PROVIDER_TIMEOUT)
-        response = client.messages.create(
-            model=model, max_tokens=max_tokens,
-            system=system_prompt, messages=messages)
-        return response.content[0].text, getattr(response, "usage", None)
+        with client.messages.stream(
+                model=model, max_tokens=max_tokens,
+                system=_anthropic_system(system_prompt),
+                messages=messages) as stream:
+            yield from stream.text_stream
+            if usage_out is not None:
+                usage_out.append(stream.get_final_message().usage)
     else:
-        kwargs = {"api_key": api_key, "timeout": AI_PROVIDER_TIMEOUT}
-        base_url = _PROVIDER_DEFAULTS.get(provider, {}).get("base_url")
-        if base_url:
-            kwargs["base_url"] = base_url
-        client = openai.OpenAI(**kwargs)
-        oai_messages = []
-        if system_prompt:
-            oai_messages.append({"role": "system", "content": system_prompt})
-        oai_messages.extend(messages)
-        token_kwarg = _openai_token_kwarg(model, max_tokens)
-        try:
-            response = client.chat.completions.create(
-                model=model, messages=oai_messages, **token_kwarg)
-        except openai.BadRequestError as e:
-            # Fallback: swap between max_tokens / max_completion_tokens
-            if "max_completion_tokens" in str(e) or "max_tokens" in str(e):
-                alt_key = ("max_tokens" if "max_completion_tokens" in token_kwarg
-                           else "max_completion_tokens")
-                logger.info("Retrying %s with %s instead", model, alt_key)
-                response = client.chat.completions.create(
-                    model=model, messages=oai_messages, **{alt_key: max_tokens})
-            else:
-                raise
-        return response.choices[0].message.content, getattr(response, "usage", None)
+        extra = {}
+        if usage_out is not None:
+            extra["stream_options"] = {"include_usage": True}
+        response = client.chat.completions.create(
+            model=model, messages=_openai_messages(system_prompt, messages),
+            stream=True, **_openai_token_kwarg(model, max_tokens), **extra)
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # Ostatni chunk (include_usage) ma puste choices i wypełnione usage
+            if usage_out is not None and getattr(chunk, "usage", None):
+                usage_out.append(chunk.usage)
 
 
 def _run_provider(config, system_prompt, user_message,
-                  max_tokens=AI_MAX_TOKENS_ANALYSIS):
-    """Run a single system+user prompt through the configured provider."""
+                  max_tokens=AI_MAX_TOKENS_ANALYSIS, on_token=None):
+    """Run a single system+user prompt through the configured provider.
+
+    *on_token* enables streaming (see _call_provider). If the stream fails
+    before the first delta, the call is retried without streaming.
+    """
     provider = config.get("ai_provider", "anthropic")
-    pcfg = _PROVIDER_DEFAULTS.get(provider)
-    if not pcfg:
+    info = _PROVIDER_INFO.get(provider)
+    if not info:
         return _make_result("Błąd: nieznany dostawca AI. Sprawdź ustawienia.")
-    api_key = get_api_key(config, pcfg["key"])
+    api_key = get_api_key(config, info.key)
     if not api_key:
-        return _make_result(
-            f"Brak klucza API {provider.capitalize()}. "
-            f"Ustaw {pcfg['env']} lub dodaj klucz w Ustawieniach.")
-    model = config.get("ai_model", pcfg["model"])
+        return _make_result(info.no_key_msg)
+    model = config.get("ai_model", info.model)
+    messages = [{"role": "user", "content": user_message}]
+    streamed = []
+
+    def _emit(delta):
+        streamed.append(delta)
+        on_token(delta)
+
     try:
+        if on_token is not None:
+            try:
+                text, usage = _call_provider(
+                    provider, api_key, model, system_prompt, messages,
+                    max_tokens=max_tokens, on_token=_emit)
+                return _make_result(text, usage)
+            except (anthropic.APIError, openai.OpenAIError, KeyError,
+                    ValueError, ConnectionError, TimeoutError) as e:
+                if streamed:
+                    raise
+                logger.info("Stream %s unavailable (%s), retrying without "
+                            "streaming", provider, e)
         text, usage = _call_provider(
-            provider, api_key, model, system_prompt,
-            [{"role": "user", "content": user_message}],
+            provider, api_key, model, system_prompt, messages,
             max_tokens=max_tokens)
         return _make_result(text, usage)
     except (anthropic.APIError, openai.OpenAIError, KeyError,
             ValueError, ConnectionError, TimeoutError) as e:
         logger.warning("AI provider %s error: %s", provider, e)
-        return _make_result(f"Błąd {provider.capitalize()} API: {e}")
+        return _make_result(f"Błąd {info.display_name} API: {e}")
 
 
 # ── Public API ────────────────────────────────────────────────────
@@ -140,9 +314,13 @@ def _build_instrument_list(market_data, instruments_config=None):
 
 
 def run_analysis(config, market_summary, news_list, scraped_text="",
-                  macro_text="", market_data=None):
+                  macro_text="", market_data=None, on_token=None):
     """Wysyła dane do wybranego modelu AI i zwraca dict z kluczami:
-    text, input_tokens, output_tokens."""
+    text, input_tokens, output_tokens.
+
+    Z *on_token* odpowiedź jest streamowana — callback dostaje kolejne
+    fragmenty tekstu (z wątku roboczego) jeszcze przed zwróceniem wyniku.
+    """
     prompt = config.get("prompt", "Przeanalizuj sytuację rynkową.")
 
     # Buduj listę instrumentów raz — używana w dwóch miejscach
@@ -172,25 +350,32 @@ def run_analysis(config, market_summary, news_list, scraped_text="",
             f"{instrument_list_text}"
         )
 
-    return _run_provider(config, prompt, full_message)
+    return _run_provider(config, prompt, full_message, on_token=on_token)
 
 
-def run_chat(config, messages, system_prompt=""):
-    """Send a multi-turn chat conversation to the configured chat model.
-
-    Always returns a plain string (backward-compatible).
-    """
+def _resolve_chat(config):
+    """Return (provider, model, api_key, error) for the chat model."""
     provider = config.get("chat_provider") or config.get("ai_provider", "openai")
     model = config.get("chat_model") or config.get("ai_model", "gpt-4o")
 
-    pcfg = _PROVIDER_DEFAULTS.get(provider)
-    if not pcfg:
-        return "Nieznany dostawca AI dla czatu."
+    info = _PROVIDER_INFO.get(provider)
+    if not info:
+        return provider, model, None, "Nieznany dostawca AI dla czatu."
 
-    api_key = get_api_key(config, pcfg["key"])
+    api_key = get_api_key(config, info.key)
     if not api_key:
-        return (f"Brak klucza API {provider.capitalize()}. "
-                f"Ustaw {pcfg['env']} lub dodaj klucz w Ustawieniach.")
+        return provider, model, None, info.no_key_msg
+    return provider, model, api_key, None
+
+
+def run_chat(config, messages, system_prompt=""):
+    """Send a multi-turn chat conversation to the configured chat model.
+
+    Always returns a plain string (backward-compatible).
+    """
+    provider, model, api_key, error = _resolve_chat(config)
+    if error:
+        return error
     try:
         text, _ = _call_provider(
             provider, api_key, model, system_prompt,
@@ -199,11 +384,45 @@ def run_chat(config, messages, system_prompt=""):
     except (anthropic.APIError, openai.OpenAIError, KeyError,
             ValueError, ConnectionError, TimeoutError) as e:
         logger.warning("Chat %s error: %s", provider, e)
-        return f"Błąd {provider.capitalize()}: {e}"
+        return f"Błąd {_display_name(provider)}: {e}"
 
 
-def generate_instrument_profile(config, symbol, name, category):
-    """Generate a one-time AI profile for an instrument (cached by caller)."""
+def stream_chat(config, messages, system_prompt=""):
+    """Like run_chat, but yields the reply as text deltas while it arrives.
+
+    If streaming fails before the first delta, falls back to a single
+    run_chat call; errors after that are yielded as a trailing message.
+    """
+    provider, model, api_key, error = _resolve_chat(config)
+    if error:
+        yield error
+        return
+    started = False
+    try:
+        for delta in _stream_provider(
+                provider, api_key, model, system_prompt,
+                messages, max_tokens=AI_MAX_TOKENS_CHAT):
+            started = True
+            yield delta
+    except (anthropic.APIError, openai.OpenAIError, KeyError,
+            ValueError, ConnectionError, TimeoutError) as e:
+        if started:
+            logger.warning("Chat stream %s interrupted: %s", provider, e)
+            yield f"\n\n[Błąd {_display_name(provider)}: {e}]"
+        else:
+            logger.info("Chat stream %s unavailable (%s), retrying without "
+                        "streaming", provider, e)
+            yield run_chat(config, messages, system_prompt)
+
+
+# {(provider, model, sha1(prompt)): Future} — identical profile requests
+# already on the wire (e.g. popup refresh during bulk generation).
+_profile_inflight = {}
+_profile_inflight_lock = threading.Lock()
+
+
+def _profile_prompt(config, symbol, name, category):
+    """Return (system, user_msg) for an instrument profile request."""
     system = (
         "Jesteś ekspertem rynków finansowych. Przygotuj zwięzły profil "
         "instrumentu finansowego. Odpowiadaj po polsku, konkretnie i rzeczowo."
@@ -226,9 +445,238 @@ def generate_instrument_profile(config, symbol, name, category):
         f"Kategoria: {category}\n\n"
         f"{custom_prompt}"
     )
-    return _result_text(
-        _run_provider(config, system, user_msg,
-                      max_tokens=AI_MAX_TOKENS_PROFILE))
+    return system, user_msg
+
+
+def generate_instrument_profile(config, symbol, name, category):
+    """Generate a one-time AI profile for an instrument (cached by caller).
+
+    Concurrent identical requests share a single provider call.
+    """
+    system, user_msg = _profile_prompt(config, symbol, name, category)
+    key = (config.get("ai_provider"), config.get("ai_model"),
+           hashlib.sha1(f"{system}\0{user_msg}".encode("utf-8")).hexdigest())
+    with _profile_inflight_lock:
+        future = _profile_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _profile_inflight[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        text = _result_text(
+            _run_provider(config, system, user_msg,
+                          max_tokens=AI_MAX_TOKENS_PROFILE))
+        future.set_result(text)
+        return text
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _profile_inflight_lock:
+            _profile_inflight.pop(key, None)
+
+
+_provider_slots = {}
+_provider_slots_lock = threading.Lock()
+
+
+def _provider_semaphore(provider):
+    """Per-provider cap on concurrent batch calls (shared by all batches)."""
+    with _provider_slots_lock:
+        sem = _provider_slots.get(provider)
+        if sem is None:
+            sem = _provider_slots[provider] = threading.BoundedSemaphore(
+                AI_PROVIDER_MAX_CONCURRENT)
+        return sem
+
+
+def _notify_result(on_result, sym, text, error):
+    """Call *on_result* without letting a callback failure stop the batch."""
+    if on_result is None:
+        return
+    try:
+        on_result(sym, text, error)
+    except Exception:
+        logger.exception("Profile result callback for %s failed", sym)
+
+
+def generate_instrument_profiles_batch(config, instruments,
+                                       max_workers=AI_PROFILE_MAX_WORKERS,
+                                       on_start=None, on_result=None,
+                                       cancel=None, on_batch=None):
+    """Generate profiles for many instruments concurrently.
+
+    *instruments*: dicts with ``symbol`` and optional ``name``/``category``.
+    *on_start(symbol)* and *on_result(symbol, text, exc)* are called from
+    worker threads. Returns ``{symbol: text}`` for successful profiles.
+    *cancel*: optional ``threading.Event``; once set, instruments that have
+    not started yet are skipped (no callbacks) — requests already in flight
+    still finish.
+    *on_batch(batch_id, symbols)*: Message Batches mode only, see
+    _profiles_via_message_batch.
+    """
+    instruments = list(instruments)
+    if not instruments:
+        return {}
+    provider = config.get("ai_provider", "anthropic")
+    if config.get("profile_batch_api") and provider == "anthropic":
+        try:
+            return _profiles_via_message_batch(
+                config, instruments, on_start, on_result,
+                cancel=cancel, on_batch=on_batch)
+        except (anthropic.APIError, ValueError, ConnectionError,
+                TimeoutError) as e:
+            # Nie udało się nawet wysłać paczki — generuj w trybie bieżącym
+            logger.warning("Message Batches unavailable (%s), falling back "
+                           "to real-time requests", e)
+    slots = _provider_semaphore(provider)
+    results = {}
+
+    def _one(inst):
+        sym = inst["symbol"]
+        text, error = None, None
+        with slots:
+            if cancel is not None and cancel.is_set():
+                return
+            if on_start:
+                on_start(sym)
+            try:
+                text = generate_instrument_profile(
+                    config, sym, inst.get("name", sym),
+                    inst.get("category", "Inne"))
+                results[sym] = text
+            except Exception as exc:
+                logger.error("Profile generation %s failed: %s", sym, exc)
+                error = exc
+        _notify_result(on_result, sym, text, error)
+
+    with DaemonThreadPool(
+            max_workers=min(len(instruments), max_workers),
+            thread_name_prefix="ia-profile") as ex:
+        list(ex.map(_one, instruments))
+    return results
+
+
+def _profiles_via_message_batch(config, instruments, on_start=None,
+                                on_result=None, cancel=None, on_batch=None):
+    """Generate profiles through the Anthropic Message Batches API.
+
+    Batch requests cost ~50% of real-time ones but may take minutes to
+    complete; the job is polled with exponential backoff. Same callbacks and
+    return value as generate_instrument_profiles_batch. Raises if the batch
+    cannot be submitted.
+
+    *on_batch(batch_id, symbols)* is called once the job is submitted, so
+    the caller can persist it, and with ``symbols=None`` once its results
+    have been collected. A job interrupted by *cancel* or by the
+    AI_BATCH_MAX_WAIT_S deadline stays pending — see
+    resume_profile_message_batch.
+    """
+    info = _PROVIDER_INFO["anthropic"]
+    api_key = get_api_key(config, info.key)
+    if not api_key:
+        raise ValueError(info.no_key_msg)
+    model = config.get("ai_model", info.model)
+    client = _make_client("anthropic", api_key)
+
+    # custom_id musi pasować do [a-zA-Z0-9_-]{1,64} — symbole (^GSPC, EURUSD=X)
+    # nie zawsze pasują, więc używamy indeksu (p0, p1, … w kolejności symbols)
+    requests = []
+    symbols = []
+    for i, inst in enumerate(instruments):
+        sym = inst["symbol"]
+        system, user_msg = _profile_prompt(
+            config, sym, inst.get("name", sym), inst.get("category", "Inne"))
+        symbols.append(sym)
+        requests.append({
+            "custom_id": f"p{i}",
+            "params": {
+                "model": model, "max_tokens": AI_MAX_TOKENS_PROFILE,
+                "system": _anthropic_system(system),
+                "messages": [{"role": "user", "content": user_msg}],
+            },
+        })
+    batch = client.messages.batches.create(requests=requests)
+    if on_batch:
+        on_batch(batch.id, symbols)
+    if on_start:
+        for sym in symbols:
+            on_start(sym)
+    return _collect_message_batch(client, batch, symbols, on_result,
+                                  cancel, on_batch)
+
+
+def resume_profile_message_batch(config, batch_id, symbols, on_result=None,
+                                 cancel=None, on_batch=None):
+    """Finish waiting for a Message Batches job submitted in an earlier run.
+
+    *symbols* is the list passed to *on_batch* when the job was created.
+    Callbacks and return value as in _profiles_via_message_batch.
+    """
+    info = _PROVIDER_INFO["anthropic"]
+    api_key = get_api_key(config, info.key)
+    if not api_key:
+        raise ValueError(info.no_key_msg)
+    client = _make_client("anthropic", api_key)
+    try:
+        batch = client.messages.batches.retrieve(batch_id)
+    except anthropic.NotFoundError:
+        # Usunięte po stronie API (wyniki są dostępne 29 dni) — zapominamy o nim
+        logger.warning("Message batch %s no longer exists", batch_id)
+        if on_batch:
+            on_batch(batch_id, None)
+        return {}
+    return _collect_message_batch(client, batch, symbols, on_result,
+                                  cancel, on_batch)
+
+
+def _collect_message_batch(client, batch, symbols, on_result, cancel,
+                           on_batch):
+    """Poll *batch* until it ends, then report every symbol's result."""
+    by_id = {f"p{i}": sym for i, sym in enumerate(symbols)}
+    waiter = cancel if cancel is not None else threading.Event()
+    deadline = time.monotonic() + AI_BATCH_MAX_WAIT_S
+    results = {}
+    missing = RuntimeError("missing batch result")
+    try:
+        delay = AI_BATCH_POLL_MIN_S
+        while batch.processing_status != "ended":
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"batch still processing after {AI_BATCH_MAX_WAIT_S} s")
+            # wait() zamiast sleep — zamknięcie aplikacji przerywa czekanie
+            if waiter.wait(min(delay, remaining)):
+                logger.info("Message batch %s left pending (shutdown)", batch.id)
+                return results
+            delay = min(delay * 2, AI_BATCH_POLL_MAX_S)
+            batch = client.messages.batches.retrieve(batch.id)
+
+        for entry in client.messages.batches.results(batch.id):
+            sym = by_id.pop(entry.custom_id, None)
+            if sym is None:
+                continue
+            text, error = None, None
+            try:
+                if entry.result.type != "succeeded":
+                    raise RuntimeError(f"batch request {entry.result.type}")
+                text = entry.result.message.content[0].text
+                results[sym] = text
+            except (RuntimeError, AttributeError, IndexError, TypeError) as e:
+                text, error = None, e
+                logger.error("Profile generation %s failed: %s", sym, error)
+            _notify_result(on_result, sym, text, error)
+        if on_batch:
+            on_batch(batch.id, None)
+    except (anthropic.APIError, ConnectionError, TimeoutError) as e:
+        # Zadanie zostaje zapisane — kolejne uruchomienie spróbuje je dokończyć
+        logger.error("Message batch %s failed: %s", batch.id, e)
+        missing = e
+    # Instrumenty bez wyniku zgłaszamy jako błąd, żeby postęp w UI się domknął
+    for sym in by_id.values():
+        _notify_result(on_result, sym, None, missing)
+    return results
 
 
 def generate_calendar_event_analysis(config, event_data):
@@ -279,34 +727,36 @@ def generate_calendar_event_analysis(config, event_data):
                       max_tokens=AI_MAX_TOKENS_CALENDAR))
 
 
+_AVAILABLE_MODELS = {
+    "anthropic": [
+        "claude-opus-4-6",
+        "claude-sonnet-4-6",
+        "claude-haiku-4-5-20251001"
+    ],
+    "openai": [
+        "o3-mini",
+        "gpt-4.1",
+        "gpt-4o",
+        "gpt-4.1-mini",
+    ],
+    "openrouter": [
+        "anthropic/claude-sonnet-4",
+        "anthropic/claude-haiku-4",
+        "openai/gpt-4o",
+        "openai/gpt-4.1",
+        "openai/gpt-4o-mini",
+        "google/gemini-2.0-flash-001",
+        "google/gemini-2.5-pro-preview",
+        "meta-llama/llama-3.3-70b-instruct",
+        "deepseek/deepseek-chat-v3-0324",
+        "mistralai/mistral-large-latest",
+    ]
+}
+
+
 def get_available_models(provider):
     """Zwraca listę dostępnych modeli dla danego dostawcy."""
-    models = {
-        "anthropic": [
-            "claude-opus-4-6",
-            "claude-sonnet-4-6",
-            "claude-haiku-4-5-20251001"
-        ],
-        "openai": [
-            "o3-mini",
-            "gpt-4.1",
-            "gpt-4o",
-            "gpt-4.1-mini",
-        ],
-        "openrouter": [
-            "anthropic/claude-sonnet-4",
-            "anthropic/claude-haiku-4",
-            "openai/gpt-4o",
-            "openai/gpt-4.1",
-            "openai/gpt-4o-mini",
-            "google/gemini-2.0-flash-001",
-            "google/gemini-2.5-pro-preview",
-            "meta-llama/llama-3.3-70b-instruct",
-            "deepseek/deepseek-chat-v3-0324",
-            "mistralai/mistral-large-latest",
-        ]
-    }
-    return models.get(provider, [])
+    return list(_AVAILABLE_MODELS.get(provider, ()))
 
 
 # ── Helpers ───────────────────────────────────────────────────────
@@ -327,49 +777,92 @@ def _result_text(result):
     return result
 
 
+@functools.lru_cache(maxsize=1)
+def _format_minute(minute):
+    """'YYYY-MM-DD HH:MM' (Europe/Warsaw) for a Unix-epoch minute."""
+    return datetime.fromtimestamp(minute * 60, _WARSAW).strftime("%Y-%m-%d %H:%M")
+
+
+def _now_str_minute():
+    """Current Warsaw time to the minute; formatted once per minute."""
+    return _format_minute(int(time.time() // 60))
+
+
+_MACRO_INSTRUCTIONS = (
+    "Na podstawie powyższych danych przeprowadź analizę w następującej strukturze:\n"
+    "0) NEWS DNIA — omów najważniejszy news i jego implikacje\n"
+    "1) GEO 24H — sytuacja per region (Świat/Europa/Polska/Am.Płn./Azja/Australia)\n"
+    "2) PORÓWNANIE TRENDU: 24h vs 7d vs 30d vs 90d — kontynuacje, anomalie, punkty zwrotne\n"
+    "3) IMPLIKACJE DLA INSTRUMENTÓW — jak powyższe wpływa na poszczególne aktywa ze snapshotu\n"
+    "4) SCENARIUSZE + RYZYKO (skala 1–10) — scenariusz bazowy, optymistyczny, pesymistyczny\n"
+    "5) PERSPEKTYWA RUCHU — kierunki, ale NIE porada inwestycyjna\n"
+    "\nOdpowiadaj po polsku. Bądź konkretny i rzeczowy."
+)
+
+
+_SCRAPED_TRIM_MARK = "\n[... skrócono ...]\n"
+
+
+def _trim_scraped(text, budget=AI_SCRAPED_TEXT_BUDGET):
+    """Cap scraped text at *budget* chars, keeping its head and tail.
+
+    Both halves are cut at line boundaries, so the last sources are not
+    lost entirely when the first ones are long.
+    """
+    if len(text) <= budget:
+        return text
+    half = budget // 2
+    cut = text.rfind("\n", 0, half)
+    head = text[:cut if cut > 0 else half]
+    nl = text.find("\n", len(text) - half)
+    tail = text[nl + 1:] if 0 <= nl < len(text) - 1 else text[-half:]
+    logger.info("Scraped text trimmed: %d of %d chars dropped",
+                len(text) - len(head) - len(tail), len(text))
+    return head + _SCRAPED_TRIM_MARK + tail
+
+
 def _build_macro_prompt(market_summary, macro_text, scraped_text=""):
-    """Build the new structured prompt with macro-trend data."""
-    parts = [
-        f"Data analizy: {datetime.now(_WARSAW).strftime('%Y-%m-%d %H:%M')}",
-        "",
-        market_summary,
-        "",
-        macro_text,
-    ]
+    """Build the new structured prompt with macro-trend data.
+
+    The timestamp goes last so the rest of the message stays byte-identical
+    between runs with the same data (provider prompt caching).
+    """
+    buf = io.StringIO()
+    buf.write(market_summary)
+    buf.write("\n\n")
+    buf.write(macro_text)
     if scraped_text:
         # Cap scraped text to avoid blowing up token costs
-        trimmed = scraped_text[:AI_SCRAPED_TEXT_BUDGET]
-        parts.append("")
-        parts.append("=== TREŚĆ ZE ŹRÓDEŁ WWW ===")
-        parts.append(trimmed)
-    parts.append("")
-    parts.append(
-        "Na podstawie powyższych danych przeprowadź analizę w następującej strukturze:\n"
-        "0) NEWS DNIA — omów najważniejszy news i jego implikacje\n"
-        "1) GEO 24H — sytuacja per region (Świat/Europa/Polska/Am.Płn./Azja/Australia)\n"
-        "2) PORÓWNANIE TRENDU: 24h vs 7d vs 30d vs 90d — kontynuacje, anomalie, punkty zwrotne\n"
-        "3) IMPLIKACJE DLA INSTRUMENTÓW — jak powyższe wpływa na poszczególne aktywa ze snapshotu\n"
-        "4) SCENARIUSZE + RYZYKO (skala 1–10) — scenariusz bazowy, optymistyczny, pesymistyczny\n"
-        "5) PERSPEKTYWA RUCHU — kierunki, ale NIE porada inwestycyjna\n"
-        "\nOdpowiadaj po polsku. Bądź konkretny i rzeczowy."
-    )
-    return "\n".join(parts)
+        buf.write("\n\n=== TREŚĆ ZE ŹRÓDEŁ WWW ===\n")
+        buf.write(_trim_scraped(scraped_text))
+    buf.write("\n\n")
+    buf.write(_MACRO_INSTRUCTIONS)
+    buf.write(f"\n\nData analizy: {_now_str_minute()}")
+    return buf.getvalue()
 
 
 def _build_legacy_prompt(market_summary, news_list, scraped_text=""):
     """Legacy prompt builder for backward compatibility."""
-    news_text = ""
-    if news_list and not any("error" in n for n in news_list):
-        news_text = "\n=== AKTUALNE WIADOMOŚCI ===\n"
-        for i, n in enumerate(news_list[:LEGACY_NEWS_LIMIT], 1):
-            news_text += f"{i}. [{n.get('source','')}] {n.get('title','')}\n"
-            if n.get("description"):
-                news_text += f"   {n.get('description','')[:LEGACY_DESCRIPTION_TRUNCATE]}...\n"
-
-    return (
-        f"Data analizy: {datetime.now(_WARSAW).strftime('%Y-%m-%d %H:%M')}\n\n"
-        f"{market_summary}\n"
-        f"{news_text}\n"
-        f"{'=== TREŚĆ ZE ŹRÓDEŁ WWW ===' + chr(10) + scraped_text if scraped_text else ''}\n\n"
-        f"Na podstawie powyższych danych przeprowadź szczegółową analizę."
-    )
+    # Jedno przejście: wpis z "error" (błąd pobrania) odrzuca cały blok newsów
+    parts = ["\n=== AKTUALNE WIADOMOŚCI ===\n"]
+    for i, n in enumerate((news_list or [])[:LEGACY_NEWS_LIMIT], 1):
+        if "error" in n:
+            parts = None
+            break
+        parts.append(f"{i}. [{n.get('source','')}] {n.get('title','')}\n")
+        desc = n.get("description")
+        if desc:
+            parts.append(f"   {desc[:LEGACY_DESCRIPTION_TRUNCATE]}...\n")
+
+    buf = io.StringIO()
+    buf.write(market_summary)
+    buf.write("\n")
+    if parts and len(parts) > 1:
+        buf.write("".join(parts))
+    buf.write("\n")
+    if scraped_text:
+        buf.write("=== TREŚĆ ZE ŹRÓDEŁ WWW ===\n")
+        buf.write(_trim_scraped(scraped_text))
+    buf.write("\n\nNa podstawie powyższych danych przeprowadź szczegółową analizę.\n\n")
+    buf.write(f"Data analizy: {_now_str_minute()}")
+    return buf.getvalue()
@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
+import functools
 import logging
+import operator
+import re
 import threading
 from modules.http_client import safe_get
 
@@ -136,9 +139,12 @@ _EVENT_SIGNIFICANCE = {
     "wage": "Dane o płacach - presja inflacyjna i konsumpcja",
 }
 
+@functools.lru_cache(maxsize=4096)
+def get_event_significance(event_title: str) -> str:
+    """Generate significance description based on event title keywords.
 
-def get_event_significance(event_title):
-    """Generate significance description based on event title keywords."""
+    Event titles repeat week after week, so results are memoised per title.
+    """
     title_lower = event_title.lower()
     for keyword, significance in _EVENT_SIGNIFICANCE.items():
         if keyword in title_lower:
@@ -146,18 +152,25 @@ def get_event_significance(event_title):
     return "Dane makroekonomiczne"
 
 
+# "2025-01-15T08:30:00-05:00" — data i godzina (czas lokalny feedu) wprost z tekstu
+_FF_DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+
 def _parse_ff_json(data):
     """Parse ForexFactory JSON into event dicts."""
     events = []
     for e in data:
         date_str = e.get("date", "")
-        try:
-            dt = datetime.fromisoformat(date_str)
-            date_fmt = dt.strftime("%Y-%m-%d")
-            time_fmt = dt.strftime("%H:%M")
-        except (ValueError, TypeError):
-            date_fmt = date_str[:10] if date_str else "?"
-            time_fmt = ""
+        if isinstance(date_str, str) and _FF_DATETIME_RE.match(date_str):
+            date_fmt, time_fmt = date_str[:10], date_str[11:16]
+        else:
+            try:
+                dt = datetime.fromisoformat(date_str)
+                date_fmt = dt.strftime("%Y-%m-%d")
+                time_fmt = dt.strftime("%H:%M")
+            except (ValueError, TypeError):
+                date_fmt = date_str[:10] if date_str else "?"
+                time_fmt = ""
 
         country = e.get("country", "")
         impact_raw = e.get("impact", "Low")
@@ -179,9 +192,10 @@ def _parse_ff_json(data):
     return events
 
 
-_calendar_cache = {"events": [], "ts": None}
+_calendar_cache = {"events": [], "ts": None, "error": None, "error_ts": None}
 _calendar_cache_lock = threading.Lock()
 _CALENDAR_CACHE_TTL = 3600  # 1 hour — ForexFactory limits to 2 req / 5 min
+_CALENDAR_FAILURE_TTL = 300  # after a failed fetch, don't retry for 5 min
 
 
 def _fetch_thisweek():
@@ -210,16 +224,28 @@ def fetch_calendar():
         impact_raw, forecast, previous, significance
     """
     now = datetime.now().timestamp()
+    today_str = datetime.now().date().strftime("%Y-%m-%d")
     with _calendar_cache_lock:
-        if (_calendar_cache["ts"] is not None
-                and now - _calendar_cache["ts"] < _CALENDAR_CACHE_TTL
-                and _calendar_cache["events"]):
-            cached = list(_calendar_cache["events"])
-            today_str = datetime.now().date().strftime("%Y-%m-%d")
-            return [e for e in cached if e["date"] >= today_str], None
+        cached = list(_calendar_cache["events"])
+        fresh = (_calendar_cache["ts"] is not None
+                 and now - _calendar_cache["ts"] < _CALENDAR_CACHE_TTL)
+        recent_error = (_calendar_cache["error_ts"] is not None
+                        and now - _calendar_cache["error_ts"] < _CALENDAR_FAILURE_TTL)
+        error = _calendar_cache["error"]
+    if cached and (fresh or recent_error):
+        # Po nieudanym odświeżeniu serwujemy starsze dane zamiast pustej listy
+        return [e for e in cached if e["date"] >= today_str], None
+    if recent_error:
+        return [], error
 
     events, err = _fetch_thisweek()
     if err and not events:
+        # Limit ForexFactory (2 req / 5 min): nie ponawiaj przy każdym odświeżeniu UI
+        with _calendar_cache_lock:
+            _calendar_cache["error"] = err
+            _calendar_cache["error_ts"] = now
+        if cached:
+            return [e for e in cached if e["date"] >= today_str], None
         return [], err
 
     # Deduplicate by (date, time, event, country)
@@ -231,12 +257,12 @@ def fetch_calendar():
             seen.add(key)
             unique.append(e)
 
-    unique.sort(key=lambda x: (x["date"], x["time"]))
+    unique.sort(key=operator.itemgetter("date", "time"))
 
     with _calendar_cache_lock:
         _calendar_cache["events"] = unique
         _calendar_cache["ts"] = datetime.now().timestamp()
+        _calendar_cache["error"] = _calendar_cache["error_ts"] = None
 
     # Filter from today onward
-    today_str = datetime.now().date().strftime("%Y-%m-%d")
     return [e for e in unique if e["date"] >= today_str], None
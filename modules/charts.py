@@ -2,24 +2,38 @@ import matplotlib
 matplotlib.use("TkAgg")
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.ticker import FuncFormatter, MaxNLocator
 import tkinter as tk
 import yfinance as yf
+import numpy as np
 import pandas as pd
+import requests
 import logging
+import math
+import re
 import sys, os
+import threading
+import time
 from datetime import datetime, timedelta
+from modules.daemon_pool import DaemonThreadPool
 from modules.http_client import safe_get
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from constants import (
     CHART_MA_SHORT_PERIOD, CHART_MA_LONG_PERIOD,
     CHART_MAX_COMPARE_SYMBOLS, CHART_SPARSE_DATA_THRESHOLD,
+    CHART_DATA_CACHE_TTL, CHART_DATA_CACHE_TTL_INTRADAY,
+    CHART_DOWNSAMPLE_THRESHOLD, CHART_DOWNSAMPLE_POINTS,
 )
 
 logger = logging.getLogger(__name__)
 
+# Długie serie (2R, dane godzinowe) — upraszczanie ścieżek przyspiesza rysowanie
+matplotlib.rcParams["path.simplify"] = True
+matplotlib.rcParams["path.simplify_threshold"] = 1.0
+
 COLORS = {
     "bg":     "#1e1e2e",
     "bg2":    "#181825",
@@ -55,12 +69,11 @@ COINGECKO_DAYS = {
 
 def _fetch_coingecko_chart(coin_id, days):
     """Fetch historical chart data from CoinGecko API."""
-    import requests as _requests
     url = (f"https://api.coingecko.com/api/v3/coins/{coin_id}"
            f"/market_chart?vs_currency=usd&days={days}")
     try:
         r = safe_get(url)
-    except _requests.RequestException as exc:
+    except requests.RequestException as exc:
         logger.warning("CoinGecko chart %s/%sd failed: %s", coin_id, days, exc)
         return pd.DataFrame()
     data = r.json()
@@ -71,24 +84,59 @@ def _fetch_coingecko_chart(coin_id, days):
     if not prices:
         return pd.DataFrame()
 
-    df = pd.DataFrame(prices, columns=["timestamp", "Close"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df.set_index("timestamp", inplace=True)
+    # Jedna konwersja list → ndarray; bez drugiego DataFrame i join po indeksie
+    arr = np.asarray(prices, dtype=float)
+    index = pd.to_datetime(arr[:, 0], unit="ms").rename("timestamp")
+    close = arr[:, 1]
+    cols = {"Close": close}
 
     if volumes:
-        vol_df = pd.DataFrame(volumes, columns=["timestamp", "Volume"])
-        vol_df["timestamp"] = pd.to_datetime(vol_df["timestamp"], unit="ms")
-        vol_df.set_index("timestamp", inplace=True)
-        df = df.join(vol_df, how="left")
+        varr = np.asarray(volumes, dtype=float)
+        if len(varr) == len(arr) and np.array_equal(varr[:, 0], arr[:, 0]):
+            cols["Volume"] = varr[:, 1]
+        else:
+            vol = pd.Series(varr[:, 1], index=pd.to_datetime(varr[:, 0], unit="ms"))
+            vol = vol[~vol.index.duplicated(keep="last")]
+            cols["Volume"] = vol.reindex(index).to_numpy()
 
-    df["Open"] = df["Close"].shift(1)
-    df.loc[df.index[0], "Open"] = df["Close"].iloc[0]
+    opn = np.empty_like(close)
+    opn[0] = close[0]
+    opn[1:] = close[:-1]
+    cols["Open"] = opn
 
-    return df
+    return pd.DataFrame(cols, index=index)
+
+# {(symbol, period, source): (monotonic_ts, DataFrame)}
+_chart_data_cache = {}
+_chart_data_cache_lock = threading.Lock()
+_INTRADAY_PERIODS = frozenset({"1D", "5D"})
 
 
 def fetch_chart_data(symbol, period, source="yfinance"):
-    """Fetch chart data from the appropriate source."""
+    """Fetch chart data from the appropriate source.
+
+    Non-empty results are cached in memory (CHART_DATA_CACHE_TTL, shorter
+    for intraday periods), so switching period tabs / compare symbols back
+    and forth is instant.
+    Returns a copy — callers may modify it.
+    """
+    key = (symbol, period, source)
+    now = time.monotonic()
+    with _chart_data_cache_lock:
+        cached = _chart_data_cache.get(key)
+    ttl = (CHART_DATA_CACHE_TTL_INTRADAY if period in _INTRADAY_PERIODS
+           else CHART_DATA_CACHE_TTL)
+    if cached and now - cached[0] < ttl:
+        return cached[1].copy()
+    hist = _fetch_chart_data_uncached(symbol, period, source)
+    if hist is not None and not hist.empty:
+        with _chart_data_cache_lock:
+            _chart_data_cache[key] = (now, hist)
+        return hist.copy()
+    return hist
+
+
+def _fetch_chart_data_uncached(symbol, period, source):
     if source == "coingecko":
         days = COINGECKO_DAYS.get(period, 30)
         return _fetch_coingecko_chart(symbol, days)
@@ -123,7 +171,18 @@ def _compute_vol_colors(hist):
     else:
         close = pd.to_numeric(hist["Close"], errors="coerce").fillna(0)
         up = close >= close.shift(1).fillna(close)
-    return [COLORS["green"] if v else COLORS["red"] for v in up]
+    return np.where(up.to_numpy(), COLORS["green"], COLORS["red"]).tolist()
+
+
+def _volume_collection(index, vol, width, colors):
+    """All volume bars as one PolyCollection (one artist instead of N Rectangles)."""
+    x = mdates.date2num(index)
+    left, right, zero = x - width / 2, x + width / 2, np.zeros(len(x))
+    verts = np.stack([np.column_stack(c) for c in
+                      ((left, zero), (left, vol), (right, vol), (right, zero))],
+                     axis=1)
+    return PolyCollection(verts, facecolors=colors, edgecolors="none",
+                          alpha=0.55)
 
 
 def _setup_xaxis(ax, period, n_points):
@@ -148,6 +207,48 @@ def _setup_xaxis(ax, period, n_points):
         ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3 if period == "2R" else 2))
 
 
+def _moving_average(values, window):
+    """Simple moving average via one cumulative sum (NaN until *window* points)."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cs = np.cumsum(np.insert(np.asarray(values, dtype=float), 0, 0.0))
+        out[window - 1:] = (cs[window:] - cs[:-window]) / window
+    return out
+
+
+def _lttb_indices(values, n_out):
+    """Largest-Triangle-Three-Buckets: indices of *n_out* points keeping the shape.
+
+    X is taken as the sample position (bars are close to evenly spaced).
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = (hi + nxt_hi - 1) / 2
+        avg_y = y[hi:nxt_hi].mean()
+        xs = np.arange(lo, hi)
+        area = np.abs((a - avg_x) * (y[lo:hi] - y[a])
+                      - (a - xs) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def _plot_selection(values):
+    """Rows to draw for a line series — all of them unless it is very long."""
+    if len(values) <= CHART_DOWNSAMPLE_THRESHOLD:
+        return slice(None)
+    return _lttb_indices(values, CHART_DOWNSAMPLE_POINTS)
+
+
 def _add_markers_sparse(ax, closes, color):
     """For very sparse data (≤10 points) add dot markers for visibility."""
     if len(closes) <= CHART_SPARSE_DATA_THRESHOLD:
@@ -155,28 +256,55 @@ def _add_markers_sparse(ax, closes, color):
                 zorder=4)
 
 
+def _vol_fmt(x, _):
+    """Volume tick label: 1.2B / 3.4M / 560K."""
+    if x >= 1e9: return f"{x/1e9:.1f}B"
+    if x >= 1e6: return f"{x/1e6:.1f}M"
+    if x >= 1e3: return f"{x/1e3:.0f}K"
+    return str(int(x))
+
+
+def _price_fmt(x, _):
+    """Price tick label with precision scaled to magnitude (80,000 / 1.2345)."""
+    if abs(x) >= 1e6:
+        return f"{x:,.0f}"
+    elif abs(x) >= 100:
+        return f"{x:,.2f}"
+    elif abs(x) >= 1:
+        return f"{x:.4f}"
+    else:
+        return f"{x:.6f}"
+
+
 # ── Main chart function ─────────────────────────────────────────────
 
 def create_price_chart(parent_frame, symbol, period="1M",
                        compare_symbols=None, show_ma=True,
-                       sources_map=None):
+                       sources_map=None, canvas=None):
     """Creates an enhanced price chart embedded in parent_frame.
 
     sources_map: dict mapping symbol -> source ("yfinance" or "coingecko").
     If None, defaults to yfinance for all symbols.
+    canvas: canvas returned by a previous call — its figure is cleared and
+    redrawn in place instead of building a new figure, canvas and toolbar.
     """
     if sources_map is None:
         sources_map = {}
 
     show_volume = (compare_symbols is None)
 
+    if canvas is not None:
+        fig = canvas.figure
+        fig.clear()
+    else:
+        fig = plt.figure(figsize=(10, 5.5 if show_volume else 4.5))
+
     if show_volume:
-        fig = plt.figure(figsize=(10, 5.5))
         gs = fig.add_gridspec(4, 1, hspace=0.06)
         ax = fig.add_subplot(gs[:3, 0])
         ax_vol = fig.add_subplot(gs[3, 0], sharex=ax)
     else:
-        fig, ax = plt.subplots(figsize=(10, 4.5))
+        ax = fig.add_subplot()
         ax_vol = None
 
     fig.patch.set_facecolor(COLORS["bg"])
@@ -185,17 +313,31 @@ def create_price_chart(parent_frame, symbol, period="1M",
     hist = None
     source = sources_map.get(symbol, "yfinance")
     n_points = 0
+    last_price = None
+
+    # Instrument główny i porównawcze pobieramy równolegle (każde to osobne
+    # zapytanie HTTP); wyjątki wychodzą z .result() w miejscu użycia
+    cmp_syms = [s for s in (compare_symbols or [])[:CHART_MAX_COMPARE_SYMBOLS] if s]
+    with DaemonThreadPool(max_workers=1 + len(cmp_syms)) as ex:
+        f_main = ex.submit(fetch_chart_data, symbol, period, source)
+        f_cmp = {sym: ex.submit(fetch_chart_data, sym, period,
+                                sources_map.get(sym, "yfinance"))
+                 for sym in cmp_syms}
 
     # ── Main instrument ──
     try:
-        hist = fetch_chart_data(symbol, period, source)
+        hist = f_main.result()
         if hist is not None and not hist.empty:
             closes = pd.to_numeric(hist["Close"], errors="coerce").dropna()
             n_points = len(closes)
             if not closes.empty:
+                last_price = float(closes.to_numpy()[-1])
                 plot_data = closes
                 if compare_symbols:
                     plot_data = (closes / closes.iloc[0] - 1) * 100
+                # Długie serie (np. CoinGecko godzinowo) — LTTB zamiast tysięcy wierzchołków
+                sel = _plot_selection(plot_data.to_numpy())
+                plot_data = plot_data.iloc[sel]
                 ax.plot(plot_data.index, plot_data, color=COLORS["blue"],
                         linewidth=2, label=symbol, zorder=3)
                 ax.fill_between(plot_data.index, plot_data, alpha=0.08,
@@ -204,15 +346,15 @@ def create_price_chart(parent_frame, symbol, period="1M",
 
                 # MA20
                 if show_ma and not compare_symbols and len(closes) >= CHART_MA_SHORT_PERIOD:
-                    ma_short = closes.rolling(CHART_MA_SHORT_PERIOD).mean()
-                    ax.plot(closes.index, ma_short, color=COLORS["yellow"],
+                    ma_short = _moving_average(closes.to_numpy(), CHART_MA_SHORT_PERIOD)
+                    ax.plot(closes.index[sel], ma_short[sel], color=COLORS["yellow"],
                             linewidth=1.3, label=f"MA{CHART_MA_SHORT_PERIOD}",
                             alpha=0.9, linestyle="--", zorder=2)
 
                 # MA long
                 if show_ma and not compare_symbols and len(closes) >= CHART_MA_LONG_PERIOD:
-                    ma_long = closes.rolling(CHART_MA_LONG_PERIOD).mean()
-                    ax.plot(closes.index, ma_long, color=COLORS["purple"],
+                    ma_long = _moving_average(closes.to_numpy(), CHART_MA_LONG_PERIOD)
+                    ax.plot(closes.index[sel], ma_long[sel], color=COLORS["purple"],
                             linewidth=1.3, label=f"MA{CHART_MA_LONG_PERIOD}",
                             alpha=0.9, linestyle=":", zorder=2)
             else:
@@ -235,12 +377,12 @@ def create_price_chart(parent_frame, symbol, period="1M",
             if not sym:
                 continue
             try:
-                cmp_source = sources_map.get(sym, "yfinance")
-                h = fetch_chart_data(sym, period, cmp_source)
+                h = f_cmp[sym].result()
                 if h is not None and not h.empty:
                     c = pd.to_numeric(h["Close"], errors="coerce").dropna()
                     if not c.empty:
                         c = (c / c.iloc[0] - 1) * 100
+                        c = c.iloc[_plot_selection(c.to_numpy())]
                         ax.plot(c.index, c, color=cmp_colors[i % 3],
                                 linewidth=1.5, label=sym, linestyle="--")
             except Exception:
@@ -254,22 +396,18 @@ def create_price_chart(parent_frame, symbol, period="1M",
     has_volume = False
     if ax_vol is not None and hist is not None and not hist.empty:
         ax_vol.set_facecolor(COLORS["bg"])
-        vol_ok = ("Volume" in hist.columns
-                  and pd.to_numeric(hist["Volume"], errors="coerce")
-                  .fillna(0).max() > 0)
-        if vol_ok:
+        # Kolumna wolumenu konwertowana raz — do sprawdzenia i do słupków
+        vol_arr = (pd.to_numeric(hist["Volume"], errors="coerce").fillna(0).to_numpy()
+                   if "Volume" in hist.columns else None)
+        if vol_arr is not None and vol_arr.size and vol_arr.max() > 0:
             has_volume = True
             vol_colors = _compute_vol_colors(hist)
             bw = _bar_width(hist)
-            ax_vol.bar(hist.index, hist["Volume"],
-                       color=vol_colors, alpha=0.55, width=bw)
-
-            def _vol_fmt(x, _):
-                if x >= 1e9: return f"{x/1e9:.1f}B"
-                if x >= 1e6: return f"{x/1e6:.1f}M"
-                if x >= 1e3: return f"{x/1e3:.0f}K"
-                return str(int(x))
-
+            ax_vol.xaxis.update_units(hist.index)
+            ax_vol.add_collection(
+                _volume_collection(hist.index, vol_arr, bw, vol_colors))
+            ax_vol.autoscale_view()
+            ax_vol.set_ylim(bottom=0)
             ax_vol.yaxis.set_major_formatter(FuncFormatter(_vol_fmt))
             ax_vol.set_ylabel("Vol", color=COLORS["fg"], fontsize=7)
             ax_vol.tick_params(colors=COLORS["fg"], labelsize=7)
@@ -316,15 +454,6 @@ def create_price_chart(parent_frame, symbol, period="1M",
 
     # Y-axis number formatting (e.g. 80,000 instead of 80000)
     if not compare_symbols:
-        def _price_fmt(x, _):
-            if abs(x) >= 1e6:
-                return f"{x:,.0f}"
-            elif abs(x) >= 100:
-                return f"{x:,.2f}"
-            elif abs(x) >= 1:
-                return f"{x:.4f}"
-            else:
-                return f"{x:.6f}"
         ax.yaxis.set_major_formatter(FuncFormatter(_price_fmt))
 
     _handles, _labels = ax.get_legend_handles_labels()
@@ -334,14 +463,11 @@ def create_price_chart(parent_frame, symbol, period="1M",
 
     # Title with instrument name and current price
     title_text = f"{symbol}  ·  {period}"
-    if hist is not None and not hist.empty and not compare_symbols:
-        last_close = pd.to_numeric(hist["Close"], errors="coerce").dropna()
-        if not last_close.empty:
-            price_val = last_close.iloc[-1]
-            if price_val >= 100:
-                title_text = f"{symbol}  ·  {price_val:,.2f}  ·  {period}"
-            else:
-                title_text = f"{symbol}  ·  {price_val:.4f}  ·  {period}"
+    if last_price is not None and not compare_symbols:
+        if last_price >= 100:
+            title_text = f"{symbol}  ·  {last_price:,.2f}  ·  {period}"
+        else:
+            title_text = f"{symbol}  ·  {last_price:.4f}  ·  {period}"
     ax.set_title(title_text, color=COLORS["fg"],
                  fontsize=12, fontweight="bold", pad=12)
 
@@ -352,6 +478,13 @@ def create_price_chart(parent_frame, symbol, period="1M",
     else:
         fig.subplots_adjust(left=0.10, right=0.96, top=0.92, bottom=0.18)
 
+    if canvas is not None:
+        # Stos widoków toolbara wskazuje na usunięte osie — zaczynamy od nowa
+        if canvas.toolbar is not None:
+            canvas.toolbar.update()
+        canvas.draw_idle()
+        return canvas, fig
+
     # ── Embed in Tkinter ──
     canvas = FigureCanvasTkAgg(fig, master=parent_frame)
     canvas.draw()
@@ -455,38 +588,52 @@ def _build_chart_toolbar(canvas, parent_frame):
     return bar, real_tb
 
 
+def _gauge_wedge(start_deg, end_deg):
+    """Ring segment between radius 0.6 and 1 as an (N, 2) vertex array."""
+    theta = np.linspace(np.radians(start_deg), np.radians(end_deg), 50)
+    outer = np.column_stack([np.cos(theta), np.sin(theta)])
+    return np.concatenate([outer, 0.6 * outer[::-1]])
+
+
+# Stała geometria tarczy — liczona raz przy imporcie
+_GAUGE_WEDGES = tuple(_gauge_wedge(a, b) for a, b in ((0, 60), (60, 120), (120, 180)))
+_GAUGE_COLORS = (COLORS["green"], COLORS["yellow"], COLORS["red"])
+
+
 def create_risk_gauge(parent_frame, risk_level=5):
     """Creates a half-circle risk gauge (1–10)."""
-    import numpy as np
     fig, ax = plt.subplots(figsize=(3, 2.2))
     fig.patch.set_facecolor(COLORS["bg"])
     ax.set_facecolor(COLORS["bg"])
     ax.set_aspect("equal")
     ax.axis("off")
 
-    for start_deg, end_deg, color in [
-        (0,   60,  COLORS["green"]),
-        (60,  120, COLORS["yellow"]),
-        (120, 180, COLORS["red"]),
-    ]:
-        theta = np.linspace(np.radians(start_deg), np.radians(end_deg), 50)
-        x_out = np.cos(theta)
-        y_out = np.sin(theta)
-        x_in  = 0.6 * np.cos(theta)
-        y_in  = 0.6 * np.sin(theta)
-        ax.fill(
-            np.concatenate([x_out, x_in[::-1]]),
-            np.concatenate([y_out, y_in[::-1]]),
-            color=color, alpha=0.75
-        )
+    ax.add_collection(PolyCollection(_GAUGE_WEDGES, facecolors=_GAUGE_COLORS,
+                                     edgecolors="none", alpha=0.75))
+
+    ax.plot(0, 0, "o", color=COLORS["fg"], markersize=6)
+    _draw_risk_indicator(ax, risk_level)
 
-    needle_rad = np.radians((risk_level - 1) / 9 * 180)
+    ax.set_xlim(-1.1, 1.1)
+    ax.set_ylim(-0.4, 1.1)
+    fig.tight_layout(pad=0.5)
+
+    canvas = FigureCanvasTkAgg(fig, master=parent_frame)
+    canvas.draw()
+    return canvas, fig
+
+
+_RISK_GID = "risk_indicator"
+
+
+def _draw_risk_indicator(ax, risk_level):
+    """Draw the needle and the "N/10 LABEL" caption (tagged for removal)."""
+    needle_rad = math.radians((risk_level - 1) / 9 * 180)
     ax.annotate("",
-        xy=(0.75 * np.cos(needle_rad), 0.75 * np.sin(needle_rad)),
+        xy=(0.75 * math.cos(needle_rad), 0.75 * math.sin(needle_rad)),
         xytext=(0, 0),
         arrowprops=dict(arrowstyle="-|>", color=COLORS["fg"],
-                        lw=2.5, mutation_scale=15))
-    ax.plot(0, 0, "o", color=COLORS["fg"], markersize=6)
+                        lw=2.5, mutation_scale=15)).set_gid(_RISK_GID)
 
     color = (COLORS["green"] if risk_level <= 3
              else COLORS["yellow"] if risk_level <= 6
@@ -496,29 +643,34 @@ def create_risk_gauge(parent_frame, risk_level=5):
              else "WYSOKIE")
     ax.text(0, -0.25, f"{risk_level}/10  {label}",
             ha="center", va="center", color=color,
-            fontsize=10, fontweight="bold")
+            fontsize=10, fontweight="bold").set_gid(_RISK_GID)
 
-    ax.set_xlim(-1.1, 1.1)
-    ax.set_ylim(-0.4, 1.1)
-    fig.tight_layout(pad=0.5)
 
-    canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-    canvas.draw()
-    return canvas, fig
+def update_risk_gauge(canvas, risk_level):
+    """Redraw only the needle and caption of an existing gauge canvas."""
+    ax = canvas.figure.axes[0]
+    for artist in list(ax.texts):
+        if artist.get_gid() == _RISK_GID:
+            artist.remove()
+    _draw_risk_indicator(ax, risk_level)
+    canvas.draw_idle()
+
+
+# Kolejność = priorytet; dla każdego wzorca liczy się tylko pierwsze trafienie
+_RISK_PATTERNS = tuple(re.compile(p) for p in (
+    r"\*{0,2}(\d+)\*{0,2}/10",
+    r"ryzyko[^\d]*\*{0,2}(\d+)\*{0,2}",
+    r"poziom ryzyka[^\d]*\*{0,2}(\d+)\*{0,2}",
+    r"poziomie\s+\*{0,2}(\d+)\*{0,2}",
+    r"wynosi\s+\*{0,2}(\d+)\*{0,2}",
+))
 
 
 def extract_risk_level(analysis_text):
     """Extracts risk level (1–10) from AI analysis text."""
-    import re
-    patterns = [
-        r"\*{0,2}(\d+)\*{0,2}/10",
-        r"ryzyko[^\d]*\*{0,2}(\d+)\*{0,2}",
-        r"poziom ryzyka[^\d]*\*{0,2}(\d+)\*{0,2}",
-        r"poziomie\s+\*{0,2}(\d+)\*{0,2}",
-        r"wynosi\s+\*{0,2}(\d+)\*{0,2}",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, analysis_text.lower())
+    text = analysis_text.lower()
+    for pattern in _RISK_PATTERNS:
+        match = pattern.search(text)
         if match:
             val = int(match.group(1))
             if 1 <= val <= 10:
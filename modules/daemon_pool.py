@@ -0,0 +1,99 @@
+"""Pula wątków-demonów z interfejsem ThreadPoolExecutor (submit/map/shutdown).
+
+Wątki concurrent.futures.ThreadPoolExecutor nie są daemon i interpreter
+dołącza je (join) przy wyjściu — zawieszone żądanie AI/HTTP trzymałoby proces
+przy życiu po zamknięciu okna. Tu, jak w reszcie aplikacji, wątki mają
+daemon=True; zwracane obiekty to zwykłe concurrent.futures.Future, więc
+as_completed / wait działają bez zmian.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DaemonThreadPool:
+    """Stała pula wątków-demonów, tworzonych leniwie do *max_workers*."""
+
+    def __init__(self, max_workers, thread_name_prefix="ia-pool"):
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self._max_workers = max_workers
+        self._prefix = thread_name_prefix
+        self._queue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args, kwargs))
+            # Wolny wątek weźmie zadanie; nowy tylko gdy wszystkie są zajęte
+            if (not self._idle.acquire(blocking=False)
+                    and len(self._threads) < self._max_workers):
+                t = threading.Thread(
+                    target=self._work, daemon=True,
+                    name=f"{self._prefix}_{len(self._threads)}")
+                t.start()
+                self._threads.append(t)
+        return future
+
+    def map(self, fn, *iterables):
+        """Like Executor.map: results in input order, errors re-raised."""
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+
+        def _results():
+            for f in futures:
+                yield f.result()
+        return _results()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            del item
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            del future
+            self._idle.release()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Stop accepting work; optionally cancel queued tasks and join.
+
+        Running tasks are never interrupted — with ``wait=False`` they are
+        simply abandoned to their daemon threads.
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            for _ in self._threads:
+                self._queue.put(None)
+            threads = list(self._threads)
+        if wait:
+            for t in threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+        return False
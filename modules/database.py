@@ -1,8 +1,10 @@
 import sqlite3
+import functools
 import json
 import os
 import sys
 import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -11,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from constants import (
     DB_DEFAULT_REPORTS_LIMIT, DB_REPORT_PREVIEW_LENGTH,
     DB_DEFAULT_PRICE_HISTORY_DAYS, DB_PRICE_HISTORY_MULTIPLIER,
+    DB_ALERTS_CACHE_TTL,
 )
 
 _WARSAW = ZoneInfo("Europe/Warsaw")
@@ -136,6 +139,13 @@ def init_db():
                 created_at TEXT NOT NULL
             )
         """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS profile_batches (
+                batch_id TEXT PRIMARY KEY,
+                symbols TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
         conn.commit()
         _migrate_reports_usage(conn)
         _migrate_portfolio_currency(conn)
@@ -169,6 +179,31 @@ def get_reports(limit=DB_DEFAULT_REPORTS_LIMIT):
         """, (limit,))
         return c.fetchall()
 
+def get_history_rows(limit=DB_DEFAULT_REPORTS_LIMIT):
+    """Zwraca wiersze do listy historii, sformatowane już po stronie SQL.
+
+    Krotki: (id, data "YYYY-MM-DD HH:MM", "provider/model", "risk/10",
+    provider, model).
+    """
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT id, substr(created_at, 1, 16),
+                   provider || '/' || model, risk_level || '/10',
+                   provider, model
+            FROM reports ORDER BY created_at DESC LIMIT ?
+        """, (limit,))
+        return c.fetchall()
+
+def get_report_analysis(report_id):
+    """Zwraca (analysis, input_tokens, output_tokens) raportu lub None."""
+    with _connect() as conn:
+        c = conn.cursor()
+        c.execute(
+            "SELECT analysis, input_tokens, output_tokens FROM reports WHERE id = ?",
+            (report_id,))
+        return c.fetchone()
+
 def get_report_by_id(report_id):
     """Zwraca pełny raport po ID."""
     with _connect() as conn:
@@ -207,8 +242,18 @@ def get_price_history(symbol, days=DB_DEFAULT_PRICE_HISTORY_DAYS):
         """, (symbol, days * DB_PRICE_HISTORY_MULTIPLIER))
         return list(reversed(c.fetchall()))
 
+_alert_listeners = []
+# Podbijany przy każdej zmianie tabeli alerts — natychmiast unieważnia cache
+_alert_epoch = 0
+
+
+def add_alert_listener(callback):
+    """Rejestruje callback() wołany po każdym add_alert (z wątku piszącego)."""
+    _alert_listeners.append(callback)
+
+
 def add_alert(symbol, message):
-    """Dodaje alert."""
+    """Dodaje alert i powiadamia zarejestrowanych słuchaczy."""
     with _connect() as conn:
         c = conn.cursor()
         c.execute("""
@@ -216,13 +261,31 @@ def add_alert(symbol, message):
             VALUES (?, ?, ?)
         """, (_now_warsaw().strftime("%Y-%m-%d %H:%M:%S"), symbol, message))
         conn.commit()
+        _bump_alert_epoch()
+    for callback in list(_alert_listeners):
+        callback()
 
-def get_unseen_alerts():
-    """Zwraca nieprzeczytane alerty."""
+def _bump_alert_epoch():
+    global _alert_epoch
+    _alert_epoch += 1
+
+@functools.lru_cache(maxsize=1)
+def _query_unseen_alerts(db_path, epoch, bucket):
+    """Odczyt nieprzeczytanych alertów; argumenty służą tylko jako klucz cache."""
     with _connect() as conn:
         c = conn.cursor()
         c.execute("SELECT id, created_at, symbol, message FROM alerts WHERE seen = 0 ORDER BY created_at DESC")
-        return c.fetchall()
+        return tuple(c.fetchall())
+
+def get_unseen_alerts():
+    """Zwraca nieprzeczytane alerty.
+
+    Wynik jest cache'owany na DB_ALERTS_CACHE_TTL s (zapisy z innego procesu,
+    np. instancji z --auto-analysis); zapisy w tym procesie unieważniają
+    cache natychmiast.
+    """
+    bucket = int(time.monotonic() // DB_ALERTS_CACHE_TTL)
+    return list(_query_unseen_alerts(DB_PATH, _alert_epoch, bucket))
 
 def mark_alerts_seen():
     """Oznacza wszystkie alerty jako przeczytane."""
@@ -230,13 +293,15 @@ def mark_alerts_seen():
         c = conn.cursor()
         c.execute("UPDATE alerts SET seen = 1 WHERE seen = 0")
         conn.commit()
+        _bump_alert_epoch()
 
 def delete_report(report_id):
-    """Usuwa raport po ID."""
+    """Usuwa raport po ID. Zwraca ID usuniętego raportu lub None."""
     with _connect() as conn:
         c = conn.cursor()
         c.execute("DELETE FROM reports WHERE id = ?", (report_id,))
         conn.commit()
+        return report_id if c.rowcount else None
 
 # ── PORTFOLIO ──
 
@@ -296,5 +361,34 @@ def save_instrument_profile(symbol, profile_text):
         conn.commit()
 
 
+# ── PROFILE MESSAGE BATCHES (oczekujące zadania Anthropic) ──
+
+def save_profile_batch(batch_id, symbols):
+    """Zapamiętuje wysłane zadanie, żeby dokończyć je po restarcie."""
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO profile_batches (batch_id, symbols, created_at) "
+            "VALUES (?, ?, ?)",
+            (batch_id, json.dumps(symbols),
+             _now_warsaw().strftime("%Y-%m-%d %H:%M:%S")))
+        conn.commit()
+
+
+def get_profile_batches():
+    """Zwraca listę (batch_id, [symbole]) niedokończonych zadań."""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT batch_id, symbols FROM profile_batches ORDER BY created_at"
+        ).fetchall()
+    return [(batch_id, json.loads(symbols)) for batch_id, symbols in rows]
+
+
+def delete_profile_batch(batch_id):
+    with _connect() as conn:
+        conn.execute("DELETE FROM profile_batches WHERE batch_id = ?",
+                     (batch_id,))
+        conn.commit()
+
+
 # Inicjalizacja przy imporcie
 init_db()
\ No newline at end of file
@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from config import get_api_key
 from modules.http_client import safe_get
 from constants import (
-    FX_CACHE_TTL, YFINANCE_HISTORY_PERIOD,
+    FX_CACHE_TTL, FX_FAILURE_TTL, YFINANCE_HISTORY_PERIOD,
     PRICE_ROUND_DECIMALS, CHANGE_PCT_ROUND_DECIMALS,
     NEWS_DEFAULT_PAGE_SIZE,
 )
@@ -265,6 +265,7 @@ def get_stooq_data(symbol, name=""):
 _fx_cache = {}       # {"PLNUSD": (rate, timestamp), ...}
 _fx_lock = _threading.Lock()
 _FX_CACHE_TTL = FX_CACHE_TTL
+_FX_FAILURE_TTL = FX_FAILURE_TTL
 
 def get_fx_to_usd(currency):
     """Return the multiplier that converts *currency* → USD.
@@ -279,26 +280,28 @@ def get_fx_to_usd(currency):
     cache_key = f"{currency}USD"
     with _fx_lock:
         cached = _fx_cache.get(cache_key)
-        if cached and (_time.time() - cached[1]) < _FX_CACHE_TTL:
-            return cached[0]
+        if cached:
+            ttl = _FX_CACHE_TTL if cached[0] is not None else _FX_FAILURE_TTL
+            if (_time.time() - cached[1]) < ttl:
+                return cached[0]
 
     # yfinance ticker format: PLNUSD=X, EURUSD=X
     ticker_symbol = f"{currency}USD=X"
+    rate = None
     try:
         ticker = yf.Ticker(ticker_symbol)
         hist = ticker.history(period=YFINANCE_HISTORY_PERIOD)
-        if hist.empty:
-            return None
-        closes = pd.to_numeric(hist["Close"], errors="coerce").dropna()
-        if closes.empty:
-            return None
-        rate = float(closes.iloc[-1])
-        with _fx_lock:
-            _fx_cache[cache_key] = (rate, _time.time())
-        return rate
+        if not hist.empty:
+            closes = pd.to_numeric(hist["Close"], errors="coerce").dropna()
+            if not closes.empty:
+                rate = float(closes.iloc[-1])
     except (requests.RequestException, KeyError, ValueError, TypeError) as e:
         logger.warning("FX fetch %s failed: %s", ticker_symbol, e)
-        return None
+    # Porażki też trafiają do cache (krótszy TTL), żeby odświeżanie
+    # etykiet nie odpytywało sieci przy każdym repaincie.
+    with _fx_lock:
+        _fx_cache[cache_key] = (rate, _time.time())
+    return rate
 
 
 # ── POBIERZ WSZYSTKIE INSTRUMENTY ──
@@ -4,6 +4,7 @@ Provides ``get_model_cost(model_key, input_tokens, output_tokens)``
 returning cost in USD (float) or *None* when the model is unknown.
 """
 
+import functools
 import json
 import logging
 import os
@@ -130,9 +131,16 @@ def _fetch_from_web() -> dict | None:
 
 
 # ── Resolve best pricing dict ───────────────────────────────────
-def _get_pricing() -> dict:
+def _store_pricing(pricing: dict) -> dict:
+    """Install *pricing* as the in-memory table and drop memoized rates."""
     global _pricing, _pricing_ts
+    with _pricing_lock:
+        _pricing, _pricing_ts = pricing, time.time()
+    _get_model_rates.cache_clear()
+    return pricing
+
 
+def _get_pricing() -> dict:
     with _pricing_lock:
         if _pricing and (time.time() - _pricing_ts) < CACHE_TTL:
             return _pricing
@@ -140,9 +148,7 @@ def _get_pricing() -> dict:
     # 1. Disk cache (fresh)
     cached = _load_cache()
     if cached:
-        with _pricing_lock:
-            _pricing, _pricing_ts = cached, time.time()
-            return _pricing
+        return _store_pricing(cached)
 
     # 2. Web fetch
     web = _fetch_from_web()
@@ -150,31 +156,24 @@ def _get_pricing() -> dict:
         merged = dict(_FALLBACK_PRICING)
         merged.update(web)
         _save_cache(merged)
-        with _pricing_lock:
-            _pricing, _pricing_ts = merged, time.time()
-            return _pricing
+        return _store_pricing(merged)
 
     # 3. Stale disk cache
     stale = _load_cache(allow_stale=True)
     if stale:
-        with _pricing_lock:
-            _pricing, _pricing_ts = stale, time.time()
-            return _pricing
+        return _store_pricing(stale)
 
     # 4. Hardcoded fallback
-    with _pricing_lock:
-        _pricing, _pricing_ts = dict(_FALLBACK_PRICING), time.time()
-        return _pricing
+    return _store_pricing(dict(_FALLBACK_PRICING))
 
 
-# ── Public API ───────────────────────────────────────────────────
-def get_model_cost(raw_model: str,
-                   input_tokens: int,
-                   output_tokens: int) -> float | None:
-    """Return cost in USD or *None* if model is unknown."""
-    model = _normalize_model(raw_model)
-    pricing = _get_pricing()
+@functools.lru_cache(maxsize=128)
+def _get_model_rates(model: str) -> tuple[float, float] | None:
+    """Return (input, output) USD per token for *model*, or *None*.
 
+    Memoized; the cache is cleared whenever a new pricing table is stored.
+    """
+    pricing = _get_pricing()
     rates = pricing.get(model)
     if not rates:
         # Prefix match: 'gpt-4o-2024-11-20' → 'gpt-4o'
@@ -184,9 +183,20 @@ def get_model_cost(raw_model: str,
                 break
     if not rates:
         return None
+    return (rates["input"] / PRICING_TOKENS_PER_UNIT,
+            rates["output"] / PRICING_TOKENS_PER_UNIT)
+
 
-    return (input_tokens * rates["input"] / PRICING_TOKENS_PER_UNIT
-            + output_tokens * rates["output"] / PRICING_TOKENS_PER_UNIT)
+# ── Public API ───────────────────────────────────────────────────
+def get_model_cost(raw_model: str,
+                   input_tokens: int,
+                   output_tokens: int) -> float | None:
+    """Return cost in USD or *None* if model is unknown."""
+    _get_pricing()  # honours CACHE_TTL; reload clears memoized rates
+    rates = _get_model_rates(_normalize_model(raw_model))
+    if rates is None:
+        return None
+    return input_tokens * rates[0] + output_tokens * rates[1]
 
 
 def refresh_pricing():
@@ -194,4 +204,5 @@ def refresh_pricing():
     global _pricing, _pricing_ts
     with _pricing_lock:
         _pricing, _pricing_ts = None, 0.0
+    _get_model_rates.cache_clear()
     _get_pricing()
@@ -4,9 +4,10 @@ import os
 import threading
 import time
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
 from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from modules.daemon_pool import DaemonThreadPool
 from modules.url_validator import (
     validate_urls, MAX_REDIRECTS, CONNECT_TIMEOUT, READ_TIMEOUT,
     MAX_RESPONSE_BYTES,
@@ -16,6 +17,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from constants import (
     SCRAPER_CHUNK_SIZE, SCRAPER_DEFAULT_MAX_CHARS,
     SCRAPER_MAX_CHARS_PER_SITE, SCRAPER_MIN_LINE_LENGTH,
+    SCRAPER_MAX_WORKERS,
 )
 
 logger = logging.getLogger(__name__)
@@ -34,7 +36,9 @@ def _build_scraper_session():
     s = requests.Session()
     s.headers.update(HEADERS)
     s.max_redirects = MAX_REDIRECTS
-    adapter = HTTPAdapter(max_retries=0)  # scraper bez retry
+    adapter = HTTPAdapter(max_retries=0,  # scraper bez retry
+                          pool_connections=SCRAPER_MAX_WORKERS,
+                          pool_maxsize=SCRAPER_MAX_WORKERS)
     s.mount("https://", adapter)
     s.mount("http://", adapter)
     return s
@@ -128,7 +132,7 @@ def scrape_url(url, max_chars=SCRAPER_DEFAULT_MAX_CHARS):
 def scrape_all(urls, max_chars_per_site=SCRAPER_MAX_CHARS_PER_SITE, trusted_domains=None):
     """Pobiera treść ze wszystkich podanych URL-i równolegle (z walidacją).
 
-    Używa ThreadPoolExecutor, więc timeout jednego serwisu nie blokuje
+    Używa DaemonThreadPool, więc timeout jednego serwisu nie blokuje
     pozostałych – całkowity czas ≈ najwolniejszy pojedynczy request.
     """
     if not urls:
@@ -143,29 +147,33 @@ def scrape_all(urls, max_chars_per_site=SCRAPER_MAX_CHARS_PER_SITE, trusted_doma
     clean_urls = [u.strip() for u in valid_urls if u.strip()]
     if clean_urls:
         per_url_timeout = CONNECT_TIMEOUT + READ_TIMEOUT + 2
-        with ThreadPoolExecutor(max_workers=min(len(clean_urls), 6)) as executor:
-            future_to_url = {
-                executor.submit(scrape_url, url, max_chars_per_site): url
-                for url in clean_urls
-            }
-            try:
-                for future in as_completed(future_to_url,
-                                           timeout=per_url_timeout):
-                    url = future_to_url[future]
-                    try:
-                        text = future.result()
-                    except Exception as exc:
-                        text = f"[Błąd pobierania {url}: {exc}]"
-                        logger.warning(text)
-                    results_map[url] = text
-            except FuturesTimeoutError:
-                for future, url in future_to_url.items():
-                    future.cancel()
-                    if url not in results_map:
-                        msg = (f"[Pominięto {url}: "
-                               f"brak odpowiedzi w {per_url_timeout}s]")
-                        logger.warning(msg)
-                        results_map[url] = msg
+        # Bez "with": shutdown(wait=True) czekałby na zawieszone wątki
+        # i timeout poniżej nie ograniczałby czasu całej analizy.
+        executor = DaemonThreadPool(
+            max_workers=min(len(clean_urls), SCRAPER_MAX_WORKERS))
+        future_to_url = {
+            executor.submit(scrape_url, url, max_chars_per_site): url
+            for url in clean_urls
+        }
+        try:
+            for future in as_completed(future_to_url,
+                                       timeout=per_url_timeout):
+                url = future_to_url[future]
+                try:
+                    text = future.result()
+                except Exception as exc:
+                    text = f"[Błąd pobierania {url}: {exc}]"
+                    logger.warning(text)
+                results_map[url] = text
+        except FuturesTimeoutError:
+            for future, url in future_to_url.items():
+                if url not in results_map:
+                    msg = (f"[Pominięto {url}: "
+                           f"brak odpowiedzi w {per_url_timeout}s]")
+                    logger.warning(msg)
+                    results_map[url] = msg
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     lines = results_map.pop(None, [])
     for url in clean_urls:
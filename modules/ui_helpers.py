@@ -5,6 +5,8 @@ Shared UI helpers for InvestmentAdvisor:
   - Busy/spinner animation
 """
 
+import functools
+import itertools
 import re
 import sys, os
 import tkinter as tk
@@ -62,6 +64,11 @@ _RE_BOLD = re.compile(r"\*\*(.+?)\*\*")
 _RE_ITALIC = re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)")
 _RE_INLINE_CODE = re.compile(r"`([^`]+)`")
 _RE_LINK = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+# Any character that could start a block or inline construct above
+_RE_ANY_MARKUP = re.compile(r"^\s*(?:#|[-*]\s|\d+\.\s)|[*`\[]", re.MULTILINE)
+
+
+_link_ids = itertools.count()
 
 
 def insert_markdown(text_widget, content, base_tag=""):
@@ -69,63 +76,88 @@ def insert_markdown(text_widget, content, base_tag=""):
 
     base_tag: an additional tag applied to all text (e.g. "assistant").
     """
-    lines = content.split("\n")
-    in_codeblock = False
-    i = 0
+    base = (base_tag,) if base_tag else ()
+    # Text.insert accepts many (chars, tags) pairs — one Tcl call per run
+    pending = []
+    for text, tags, url in _parse_markdown(content):
+        if url is None:
+            pending += (text, tags + base)
+            continue
+        if pending:
+            text_widget.insert("end", *pending)
+            pending = []
+        # Insert link text with a unique tag for click binding
+        link_tag = f"_link_{next(_link_ids)}"
+        text_widget.tag_configure(link_tag, foreground=_ACCENT,
+                                  underline=True)
+        text_widget.insert("end", text, (link_tag,) + base + tags)
+        text_widget.tag_bind(link_tag, "<Button-1>",
+                             lambda e, u=url: webbrowser.open(u))
+        text_widget.tag_bind(link_tag, "<Enter>",
+                             lambda e: text_widget.configure(
+                                 cursor="hand2"))
+        text_widget.tag_bind(link_tag, "<Leave>",
+                             lambda e: text_widget.configure(
+                                 cursor=""))
+    if pending:
+        text_widget.insert("end", *pending)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_markdown(content):
+    """Parse *content* into insert ops, cached per text.
+
+    Each op is ``(text, tags, url)``; *tags* excludes the caller's base
+    tag and *url* is set only for links.
+    """
+    if not _RE_ANY_MARKUP.search(content):
+        return ((content + "\n", (), None),)   # plain text fast path
 
-    while i < len(lines):
-        line = lines[i]
+    ops = []
+    in_codeblock = False
 
+    for line in content.split("\n"):
         # ── Code block toggle ──
         if _RE_CODEBLOCK_START.match(line.strip()):
-            if not in_codeblock:
-                in_codeblock = True
-                i += 1
-                continue
-            else:
-                in_codeblock = False
-                i += 1
-                continue
+            in_codeblock = not in_codeblock
+            continue
 
         if in_codeblock:
-            tags = ("md_codeblock",) + ((base_tag,) if base_tag else ())
-            text_widget.insert("end", line + "\n", tags)
-            i += 1
+            ops.append((line + "\n", ("md_codeblock",), None))
             continue
 
         # ── Heading ──
         m = _RE_HEADING.match(line)
         if m:
-            level = len(m.group(1))
-            tag = f"md_h{level}"
-            tags = (tag,) + ((base_tag,) if base_tag else ())
-            text_widget.insert("end", m.group(2) + "\n", tags)
-            i += 1
+            ops.append((m.group(2) + "\n", (f"md_h{len(m.group(1))}",), None))
             continue
 
         # ── Bullet / numbered list ──
         m = _RE_BULLET.match(line)
         if m:
             prefix = m.group(1).strip()
-            body = m.group(2)
-            tags = ("md_bullet",) + ((base_tag,) if base_tag else ())
-            text_widget.insert("end", f"  {prefix} ", tags)
-            _insert_inline(text_widget, body, base_tag, extra_tags=("md_bullet",))
-            text_widget.insert("end", "\n", tags)
-            i += 1
+            ops.append((f"  {prefix} ", ("md_bullet",), None))
+            _parse_inline(ops, m.group(2), ("md_bullet",))
+            ops.append(("\n", ("md_bullet",), None))
             continue
 
         # ── Normal line with inline formatting ──
-        _insert_inline(text_widget, line, base_tag)
-        text_widget.insert("end", "\n",
-                           (base_tag,) if base_tag else ())
-        i += 1
+        _parse_inline(ops, line)
+        ops.append(("\n", (), None))
 
+    # Merge neighbours with identical tags (fewer segments to insert)
+    merged = []
+    for op in ops:
+        if (merged and op[2] is None and merged[-1][2] is None
+                and merged[-1][1] == op[1]):
+            merged[-1] = (merged[-1][0] + op[0], op[1], None)
+        elif op[0]:
+            merged.append(op)
+    return tuple(merged)
 
-def _insert_inline(text_widget, text, base_tag="", extra_tags=()):
-    """Handle inline markdown: bold, italic, code, links."""
-    base = ((base_tag,) if base_tag else ()) + tuple(extra_tags)
 
+def _parse_inline(ops, text, extra_tags=()):
+    """Handle inline markdown: bold, italic, code, links."""
     # Build a list of (start, end, tag, display_text) spans
     spans = []
     for m in _RE_BOLD_ITALIC.finditer(text):
@@ -145,7 +177,7 @@ def _insert_inline(text_widget, text, base_tag="", extra_tags=()):
                           m.group(2)))
 
     if not spans:
-        text_widget.insert("end", text, base)
+        ops.append((text, extra_tags, None))
         return
 
     spans.sort(key=lambda s: s[0])
@@ -153,32 +185,16 @@ def _insert_inline(text_widget, text, base_tag="", extra_tags=()):
     for span in spans:
         # Text before this span
         if span[0] > pos:
-            text_widget.insert("end", text[pos:span[0]], base)
-        tag = span[2]
-        display = span[3]
-        tags = (tag,) + base
-        if tag == "md_link" and len(span) > 4:
-            url = span[4]
-            # Insert link text with a unique tag for click binding
-            link_tag = f"_link_{id(span)}"
-            text_widget.tag_configure(link_tag, foreground=_ACCENT,
-                                      underline=True)
-            text_widget.insert("end", display, (link_tag,) + base)
-            text_widget.tag_bind(link_tag, "<Button-1>",
-                                 lambda e, u=url: webbrowser.open(u))
-            text_widget.tag_bind(link_tag, "<Enter>",
-                                 lambda e: text_widget.configure(
-                                     cursor="hand2"))
-            text_widget.tag_bind(link_tag, "<Leave>",
-                                 lambda e: text_widget.configure(
-                                     cursor=""))
+            ops.append((text[pos:span[0]], extra_tags, None))
+        if span[2] == "md_link" and len(span) > 4:
+            ops.append((span[3], extra_tags, span[4]))
         else:
-            text_widget.insert("end", display, tags)
+            ops.append((span[3], (span[2],) + extra_tags, None))
         pos = span[1]
 
     # Remaining text after last span
     if pos < len(text):
-        text_widget.insert("end", text[pos:], base)
+        ops.append((text[pos:], extra_tags, None))
 
 
 def _overlaps(spans, start, end):
@@ -10,8 +10,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from constants import (
     SCRAPER_MAX_REDIRECTS, SCRAPER_MAX_URLS_PER_RUN,
     HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
-    SCRAPER_MAX_RESPONSE_BYTES,
+    SCRAPER_MAX_RESPONSE_BYTES, SCRAPER_MAX_WORKERS,
 )
+from modules.daemon_pool import DaemonThreadPool
 
 logger = logging.getLogger(__name__)
 
@@ -112,7 +113,8 @@ def validate_urls(urls: list[str],
                   ) -> tuple[list[str], list[str]]:
     """Waliduje listę URL-i. Zwraca (valid_urls, errors).
 
-    Stosuje limit MAX_URLS_PER_RUN.
+    Stosuje limit MAX_URLS_PER_RUN. Sprawdzenia DNS wykonywane są
+    równolegle; kolejność wyników odpowiada kolejności wejścia.
     """
     if not urls:
         return [], []
@@ -126,11 +128,15 @@ def validate_urls(urls: list[str],
             f"(podano {len(urls)}). Nadmiarowe zostaną pominięte.")
         urls = urls[:MAX_URLS_PER_RUN]
 
-    for url in urls:
-        url = url.strip()
-        if not url:
-            continue
-        ok, err = validate_url(url, trusted_domains)
+    urls = [u.strip() for u in urls if u.strip()]
+    if not urls:
+        return valid, errors
+    with DaemonThreadPool(
+            max_workers=min(len(urls), SCRAPER_MAX_WORKERS)) as executor:
+        results = list(executor.map(
+            lambda u: validate_url(u, trusted_domains), urls))
+
+    for url, (ok, err) in zip(urls, results):
         if ok:
             valid.append(url)
         else:
@@ -63,6 +63,9 @@ class TestResultText(unittest.TestCase):
 # ── _call_provider ───────────────────────────────────────────────
 class TestCallProviderAnthropic(unittest.TestCase):
 
+    def setUp(self):
+        ai._CLIENT_CACHE.clear()
+
     @patch("modules.ai_engine.anthropic")
     def test_anthropic_call(self, mock_anthropic):
         client = MagicMock()
@@ -81,15 +84,24 @@ class TestCallProviderAnthropic(unittest.TestCase):
 
         self.assertEqual(text, "AI response")
         mock_anthropic.Anthropic.assert_called_once_with(
-            api_key="key123", timeout=ai.AI_PROVIDER_TIMEOUT)
+            api_key="key123", timeout=ai.AI_PROVIDER_TIMEOUT,
+            max_retries=ai.AI_PROVIDER_MAX_RETRIES)
         client.messages.create.assert_called_once()
         call_kwargs = client.messages.create.call_args
         self.assertEqual(call_kwargs.kwargs["model"], "claude-opus-4-6")
-        self.assertEqual(call_kwargs.kwargs["system"], "system prompt")
+        system = call_kwargs.kwargs["system"]
+        self.assertEqual(system[0]["text"], "system prompt")
+        self.assertEqual(system[0]["cache_control"], {"type": "ephemeral"})
+
+    def test_empty_system_prompt_not_wrapped(self):
+        self.assertEqual(ai._anthropic_system(""), "")
 
 
 class TestCallProviderOpenAI(unittest.TestCase):
 
+    def setUp(self):
+        ai._CLIENT_CACHE.clear()
+
     @patch("modules.ai_engine.openai")
     def test_openai_call(self, mock_openai):
         client = MagicMock()
@@ -105,7 +117,8 @@ class TestCallProviderOpenAI(unittest.TestCase):
 
         self.assertEqual(text, "GPT response")
         mock_openai.OpenAI.assert_called_once_with(
-            api_key="sk-key", timeout=ai.AI_PROVIDER_TIMEOUT)
+            api_key="sk-key", timeout=ai.AI_PROVIDER_TIMEOUT,
+            max_retries=ai.AI_PROVIDER_MAX_RETRIES)
 
     @patch("modules.ai_engine.openai")
     def test_openrouter_uses_base_url(self, mock_openai):
@@ -141,6 +154,29 @@ class TestCallProviderOpenAI(unittest.TestCase):
         self.assertEqual(msgs[0]["content"], "be helpful")
         self.assertEqual(msgs[1]["role"], "user")
 
+    @patch("modules.ai_engine.openai")
+    def test_streaming_collects_text_and_usage(self, mock_openai):
+        client = MagicMock()
+        mock_openai.OpenAI.return_value = client
+        usage = MagicMock(prompt_tokens=3, completion_tokens=2)
+        client.chat.completions.create.return_value = iter([
+            MagicMock(choices=[MagicMock(delta=MagicMock(content="Hel"))], usage=None),
+            MagicMock(choices=[MagicMock(delta=MagicMock(content="lo"))], usage=None),
+            MagicMock(choices=[], usage=usage),
+        ])
+        deltas = []
+
+        text, u = ai._call_provider(
+            "openai", "key", "gpt-4o", "sys",
+            [{"role": "user", "content": "q"}], on_token=deltas.append)
+
+        self.assertEqual(text, "Hello")
+        self.assertEqual(deltas, ["Hel", "lo"])
+        self.assertIs(u, usage)
+        kwargs = client.chat.completions.create.call_args.kwargs
+        self.assertTrue(kwargs["stream"])
+        self.assertEqual(kwargs["stream_options"], {"include_usage": True})
+
 
 # ── _run_provider ────────────────────────────────────────────────
 class TestRunProvider(unittest.TestCase):
@@ -156,6 +192,12 @@ class TestRunProvider(unittest.TestCase):
         result = ai._run_provider(config, "sys", "msg")
         self.assertIn("Brak klucza", result["text"])
 
+    def test_provider_info_precomputed(self):
+        info = ai._PROVIDER_INFO["openrouter"]
+        self.assertEqual(info.display_name, "Openrouter")
+        self.assertIn("OPENROUTER_API_KEY", info.no_key_msg)
+        self.assertEqual(info.base_url, "https://openrouter.ai/api/v1")
+
     @patch("modules.ai_engine._call_provider")
     @patch("modules.ai_engine.get_api_key", return_value="key123")
     def test_success(self, _, mock_call):
@@ -172,6 +214,16 @@ class TestRunProvider(unittest.TestCase):
         self.assertIn("Błąd", result["text"])
         self.assertIn("timeout", result["text"])
 
+    @patch("modules.ai_engine._call_provider")
+    @patch("modules.ai_engine.get_api_key", return_value="key123")
+    def test_stream_failure_before_first_token_retries(self, _, mock_call):
+        mock_call.side_effect = [TimeoutError("no stream"), ("full", None)]
+        config = {"ai_provider": "anthropic"}
+        result = ai._run_provider(config, "sys", "msg", on_token=lambda t: None)
+        self.assertEqual(result["text"], "full")
+        self.assertEqual(mock_call.call_count, 2)
+        self.assertNotIn("on_token", mock_call.call_args_list[1].kwargs)
+
 
 # ── run_analysis ─────────────────────────────────────────────────
 class TestRunAnalysis(unittest.TestCase):
@@ -230,6 +282,74 @@ class TestRunChat(unittest.TestCase):
         self.assertEqual(result, "r")
 
 
+class TestClientCache(unittest.TestCase):
+
+    def setUp(self):
+        ai._CLIENT_CACHE.clear()
+
+    def tearDown(self):
+        ai._CLIENT_CACHE.clear()
+
+    @patch("modules.ai_engine.anthropic")
+    def test_client_reused_for_same_key(self, mock_anthropic):
+        mock_anthropic.Anthropic.side_effect = lambda **kw: MagicMock()
+        first = ai._make_client("anthropic", "k1")
+        self.assertIs(ai._make_client("anthropic", "k1"), first)
+        mock_anthropic.Anthropic.assert_called_once()
+
+    @patch("modules.ai_engine.anthropic")
+    def test_key_rotation_builds_new_client(self, mock_anthropic):
+        mock_anthropic.Anthropic.side_effect = lambda **kw: MagicMock()
+        first = ai._make_client("anthropic", "k1")
+        second = ai._make_client("anthropic", "k2")
+        self.assertIsNot(first, second)
+        self.assertIs(ai._make_client("anthropic", "k2"), second)
+
+    @patch("modules.ai_engine.anthropic")
+    def test_close_clients_empties_cache(self, mock_anthropic):
+        mock_anthropic.Anthropic.side_effect = lambda **kw: MagicMock()
+        client = ai._make_client("anthropic", "k1")
+        ai._close_clients()
+        client.close.assert_called_once()
+        self.assertEqual(ai._CLIENT_CACHE, {})
+
+    @patch("modules.ai_engine.anthropic")
+    def test_key_rotation_keeps_connection_pool(self, mock_anthropic):
+        mock_anthropic.Anthropic.side_effect = lambda **kw: MagicMock()
+        first = ai._make_client("anthropic", "k1")
+        second = ai._make_client("anthropic", "k2")
+        first.with_options.assert_called_once_with(api_key="k2")
+        self.assertIs(second, first.with_options.return_value)
+        mock_anthropic.Anthropic.assert_called_once()
+
+
+# ── stream_chat ──────────────────────────────────────────────────
+class TestStreamChat(unittest.TestCase):
+
+    @patch("modules.ai_engine._stream_provider", return_value=iter(["a", "b"]))
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_yields_deltas(self, _, __):
+        config = {"chat_provider": "openai", "chat_model": "gpt-4o"}
+        chunks = list(ai.stream_chat(config, [{"role": "user", "content": "hi"}]))
+        self.assertEqual(chunks, ["a", "b"])
+
+    @patch("modules.ai_engine.get_api_key", return_value="")
+    def test_missing_key_yields_message(self, _):
+        config = {"chat_provider": "anthropic"}
+        chunks = list(ai.stream_chat(config, [{"role": "user", "content": "hi"}]))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn("Brak klucza", chunks[0])
+
+    @patch("modules.ai_engine._call_provider", return_value=("whole", None))
+    @patch("modules.ai_engine._stream_provider", side_effect=TimeoutError("x"))
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_falls_back_to_non_streaming(self, _, __, mock_call):
+        config = {"chat_provider": "openai", "chat_model": "gpt-4o"}
+        chunks = list(ai.stream_chat(config, [{"role": "user", "content": "hi"}]))
+        self.assertEqual(chunks, ["whole"])
+        mock_call.assert_called_once()
+
+
 # ── generate_instrument_profile ──────────────────────────────────
 class TestGenerateInstrumentProfile(unittest.TestCase):
 
@@ -253,6 +373,193 @@ class TestGenerateInstrumentProfile(unittest.TestCase):
         self.assertIn("Custom prompt here", user_msg)
 
 
+    def test_concurrent_identical_requests_share_call(self):
+        import threading, time
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_provider(*args, **kwargs):
+            started.set()
+            release.wait(2)
+            return {"text": "shared", "input_tokens": 0, "output_tokens": 0}
+
+        config = {"ai_provider": "anthropic", "ai_model": "m"}
+        results = []
+        with patch("modules.ai_engine._run_provider",
+                   side_effect=slow_provider) as mock_run:
+            first = threading.Thread(target=lambda: results.append(
+                ai.generate_instrument_profile(config, "AAPL", "Apple", "Akcje")))
+            first.start()
+            started.wait(2)
+            second = threading.Thread(target=lambda: results.append(
+                ai.generate_instrument_profile(config, "AAPL", "Apple", "Akcje")))
+            second.start()
+            time.sleep(0.2)   # let the second caller reach the shared future
+            release.set()
+            first.join(2)
+            second.join(2)
+        self.assertEqual(results, ["shared", "shared"])
+        mock_run.assert_called_once()
+
+
+class TestGenerateInstrumentProfilesBatch(unittest.TestCase):
+
+    @patch("modules.ai_engine.generate_instrument_profile")
+    def test_collects_results_and_errors(self, mock_gen):
+        def fake(config, sym, name, category):
+            if sym == "BAD":
+                raise TimeoutError("slow")
+            return f"profile {sym}"
+        mock_gen.side_effect = fake
+        seen = []
+        insts = [{"symbol": "AAPL", "name": "Apple"}, {"symbol": "BAD"},
+                 {"symbol": "MSFT", "category": "Akcje"}]
+        result = ai.generate_instrument_profiles_batch(
+            {"ai_provider": "anthropic"}, insts, max_workers=3,
+            on_result=lambda sym, text, exc: seen.append((sym, exc is None)))
+        self.assertEqual(result, {"AAPL": "profile AAPL",
+                                  "MSFT": "profile MSFT"})
+        self.assertEqual(sorted(seen), [("AAPL", True), ("BAD", False),
+                                        ("MSFT", True)])
+        mock_gen.assert_any_call({"ai_provider": "anthropic"},
+                                 "MSFT", "MSFT", "Akcje")
+
+    def test_empty(self):
+        self.assertEqual(ai.generate_instrument_profiles_batch({}, []), {})
+
+    @patch("modules.ai_engine.generate_instrument_profile", return_value="p")
+    def test_callback_error_does_not_stop_batch(self, mock_gen):
+        seen = []
+
+        def on_result(sym, text, exc):
+            seen.append(sym)
+            raise RuntimeError("db locked")
+        result = ai.generate_instrument_profiles_batch(
+            {"ai_provider": "anthropic"}, [{"symbol": "AAPL"}, {"symbol": "MSFT"}],
+            max_workers=1, on_result=on_result)
+        self.assertEqual(result, {"AAPL": "p", "MSFT": "p"})
+        self.assertEqual(seen, ["AAPL", "MSFT"])
+
+    @patch("modules.ai_engine.generate_instrument_profile")
+    def test_cancelled_skips_remaining(self, mock_gen):
+        import threading
+        cancel = threading.Event()
+        cancel.set()
+        seen = []
+        result = ai.generate_instrument_profiles_batch(
+            {"ai_provider": "anthropic"}, [{"symbol": "AAPL"}, {"symbol": "MSFT"}],
+            on_result=lambda *a: seen.append(a), cancel=cancel)
+        self.assertEqual(result, {})
+        self.assertEqual(seen, [])
+        mock_gen.assert_not_called()
+
+
+class TestProfilesViaMessageBatch(unittest.TestCase):
+
+    @staticmethod
+    def _entry(custom_id, text=None):
+        entry = MagicMock(custom_id=custom_id)
+        if text is None:
+            entry.result.type = "errored"
+        else:
+            entry.result.type = "succeeded"
+            entry.result.message.content = [MagicMock(text=text)]
+        return entry
+
+    @staticmethod
+    def _cancel(is_set=False):
+        cancel = MagicMock()
+        cancel.is_set.return_value = False
+        cancel.wait.return_value = is_set
+        return cancel
+
+    @patch("modules.ai_engine._make_client")
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_polls_and_maps_results(self, _, mock_client):
+        batches = mock_client.return_value.messages.batches
+        batches.create.return_value = MagicMock(id="b1", processing_status="in_progress")
+        batches.retrieve.return_value = MagicMock(id="b1", processing_status="ended")
+        batches.results.return_value = [self._entry("p0", "profil"),
+                                        self._entry("p1")]
+        seen, states = [], []
+        cancel = self._cancel()
+        config = {"ai_provider": "anthropic", "profile_batch_api": True}
+        result = ai.generate_instrument_profiles_batch(
+            config, [{"symbol": "^GSPC"}, {"symbol": "EURUSD=X"}],
+            on_result=lambda sym, text, exc: seen.append((sym, exc is None)),
+            cancel=cancel, on_batch=lambda *a: states.append(a))
+
+        self.assertEqual(result, {"^GSPC": "profil"})
+        self.assertEqual(seen, [("^GSPC", True), ("EURUSD=X", False)])
+        reqs = batches.create.call_args.kwargs["requests"]
+        self.assertEqual([r["custom_id"] for r in reqs], ["p0", "p1"])
+        cancel.wait.assert_called_once_with(ai.AI_BATCH_POLL_MIN_S)
+        self.assertEqual(states, [("b1", ["^GSPC", "EURUSD=X"]), ("b1", None)])
+
+    @patch("modules.ai_engine._make_client")
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_cancel_leaves_batch_pending(self, _, mock_client):
+        batches = mock_client.return_value.messages.batches
+        batches.create.return_value = MagicMock(id="b1", processing_status="in_progress")
+        states = []
+        config = {"ai_provider": "anthropic", "profile_batch_api": True}
+        result = ai.generate_instrument_profiles_batch(
+            config, [{"symbol": "A"}], cancel=self._cancel(is_set=True),
+            on_batch=lambda *a: states.append(a))
+        self.assertEqual(result, {})
+        self.assertEqual(states, [("b1", ["A"])])   # never cleared
+        batches.retrieve.assert_not_called()
+
+    @patch("modules.ai_engine.AI_BATCH_MAX_WAIT_S", 0)
+    @patch("modules.ai_engine._make_client")
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_deadline_reports_missing(self, _, mock_client):
+        batches = mock_client.return_value.messages.batches
+        batches.create.return_value = MagicMock(id="b1", processing_status="in_progress")
+        seen = []
+        config = {"ai_provider": "anthropic", "profile_batch_api": True}
+        ai.generate_instrument_profiles_batch(
+            config, [{"symbol": "A"}], cancel=self._cancel(),
+            on_result=lambda sym, text, exc: seen.append((sym, type(exc))))
+        self.assertEqual(seen, [("A", TimeoutError)])
+
+    @patch("modules.ai_engine._make_client")
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_resume_collects_results(self, _, mock_client):
+        batches = mock_client.return_value.messages.batches
+        batches.retrieve.return_value = MagicMock(id="b1", processing_status="ended")
+        batches.results.return_value = [self._entry("p1", "later")]
+        states = []
+        result = ai.resume_profile_message_batch(
+            {}, "b1", ["A", "B"], on_batch=lambda *a: states.append(a))
+        self.assertEqual(result, {"B": "later"})
+        self.assertEqual(states, [("b1", None)])
+
+    @patch("modules.ai_engine._make_client")
+    @patch("modules.ai_engine.get_api_key", return_value="key")
+    def test_malformed_entry_reported_as_error(self, _, mock_client):
+        batches = mock_client.return_value.messages.batches
+        batches.create.return_value = MagicMock(id="b1", processing_status="ended")
+        bad = self._entry("p0", "x")
+        bad.result.message.content = []
+        batches.results.return_value = [bad, self._entry("p1", "ok")]
+        seen = []
+        config = {"ai_provider": "anthropic", "profile_batch_api": True}
+        result = ai.generate_instrument_profiles_batch(
+            config, [{"symbol": "A"}, {"symbol": "B"}],
+            on_result=lambda sym, text, exc: seen.append((sym, exc is None)))
+        self.assertEqual(result, {"B": "ok"})
+        self.assertEqual(seen, [("A", False), ("B", True)])
+
+    @patch("modules.ai_engine.generate_instrument_profile", return_value="rt")
+    @patch("modules.ai_engine.get_api_key", return_value="")
+    def test_falls_back_to_real_time(self, _, mock_gen):
+        config = {"ai_provider": "anthropic", "profile_batch_api": True}
+        result = ai.generate_instrument_profiles_batch(
+            config, [{"symbol": "AAPL"}])
+        self.assertEqual(result, {"AAPL": "rt"})
+
+
 # ── get_available_models ─────────────────────────────────────────
 class TestGetAvailableModels(unittest.TestCase):
 
@@ -290,6 +597,15 @@ class TestBuildMacroPrompt(unittest.TestCase):
         result = ai._build_macro_prompt("m", "mt", "")
         self.assertNotIn("TREŚĆ ZE ŹRÓDEŁ WWW", result)
 
+    @patch("modules.ai_engine.time.time", return_value=1_700_000_000)
+    def test_timestamp_is_warsaw_minute(self, _):
+        ai._format_minute.cache_clear()
+        self.assertEqual(ai._now_str_minute(), "2023-11-14 23:13")
+        self.assertTrue(ai._build_macro_prompt("m", "mt").endswith(
+            "Data analizy: 2023-11-14 23:13"))
+        self.assertTrue(ai._build_legacy_prompt("m", []).endswith(
+            "Data analizy: 2023-11-14 23:13"))
+
 
 class TestBuildLegacyPrompt(unittest.TestCase):
 
@@ -308,6 +624,26 @@ class TestBuildLegacyPrompt(unittest.TestCase):
         result = ai._build_legacy_prompt("market", [])
         self.assertIn("market", result)
 
+    def test_scraped_text_capped(self):
+        scraped = ("x" * 99 + "\n") * 1000
+        result = ai._build_legacy_prompt("market", [], scraped)
+        self.assertLess(len(result), ai.AI_SCRAPED_TEXT_BUDGET + 500)
+
+
+class TestTrimScraped(unittest.TestCase):
+
+    def test_short_text_unchanged(self):
+        self.assertEqual(ai._trim_scraped("abc", budget=10), "abc")
+
+    def test_keeps_head_and_tail_at_line_boundaries(self):
+        self.assertEqual(
+            ai._trim_scraped("aaa\nbbb\nccc\nddd\neee", budget=12),
+            "aaa" + ai._SCRAPED_TRIM_MARK + "eee")
+
+    def test_single_long_line_hard_cut(self):
+        self.assertEqual(ai._trim_scraped("a" * 10 + "b" * 10, budget=6),
+                         "aaa" + ai._SCRAPED_TRIM_MARK + "bbb")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,96 @@
+"""Tests for calendar_data.py — ForexFactory parsing, significance, caching."""
+
+import unittest
+import sys, os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import modules.calendar_data as cal
+
+
+def _reset_cache():
+    cal._calendar_cache.update(
+        {"events": [], "ts": None, "error": None, "error_ts": None})
+
+
+class TestGetEventSignificance(unittest.TestCase):
+
+    def test_keyword_match(self):
+        self.assertIn("Inflacja", cal.get_event_significance("CPI m/m"))
+
+    def test_dictionary_order_wins_over_position(self):
+        # "wage" appears first in the title, but "cpi" comes first in the map
+        self.assertEqual(
+            cal.get_event_significance("Wage Growth vs CPI"),
+            cal._EVENT_SIGNIFICANCE["cpi"])
+
+    def test_default(self):
+        self.assertEqual(cal.get_event_significance("Mystery Index"),
+                         "Dane makroekonomiczne")
+
+
+class TestParseFFJson(unittest.TestCase):
+
+    def test_event_has_significance(self):
+        events = cal._parse_ff_json([{
+            "date": "2099-01-15T08:30:00-05:00", "country": "USD",
+            "impact": "High", "title": "CPI m/m",
+            "forecast": "0.3%", "previous": "0.2%",
+        }])
+        self.assertEqual(len(events), 1)
+        e = events[0]
+        self.assertEqual(e["date"], "2099-01-15")
+        self.assertEqual(e["time"], "08:30")
+        self.assertEqual(e["flag"], "🇺🇸")
+        self.assertEqual(e["impact_label"], "Wysoki")
+        self.assertEqual(e["significance"],
+                         cal.get_event_significance("CPI m/m"))
+
+    def test_non_t_separator_uses_slow_path(self):
+        events = cal._parse_ff_json([{"date": "2099-01-15 08:30", "title": "X"}])
+        self.assertEqual((events[0]["date"], events[0]["time"]),
+                         ("2099-01-15", "08:30"))
+
+    def test_bad_date(self):
+        events = cal._parse_ff_json([{"date": "", "title": "X"}])
+        self.assertEqual(events[0]["date"], "?")
+
+
+class TestFetchCalendar(unittest.TestCase):
+
+    def setUp(self):
+        _reset_cache()
+
+    def tearDown(self):
+        _reset_cache()
+
+    def test_returns_significance(self):
+        parsed = cal._parse_ff_json([{
+            "date": "2099-01-15T08:30:00-05:00", "country": "USD",
+            "impact": "High", "title": "Non-Farm Employment Change",
+        }])
+        with patch.object(cal, "_fetch_thisweek", return_value=(parsed, None)):
+            events, err = cal.fetch_calendar()
+        self.assertIsNone(err)
+        self.assertIn("significance", events[0])
+
+    def test_failure_not_retried_immediately(self):
+        with patch.object(cal, "_fetch_thisweek",
+                          return_value=([], "HTTP 429")) as mock_fetch:
+            self.assertEqual(cal.fetch_calendar(), ([], "HTTP 429"))
+            self.assertEqual(cal.fetch_calendar(), ([], "HTTP 429"))
+        mock_fetch.assert_called_once()
+
+    def test_stale_events_served_on_failure(self):
+        parsed = cal._parse_ff_json([{
+            "date": "2099-01-15T08:30:00-05:00", "title": "GDP q/q"}])
+        cal._calendar_cache.update({"events": parsed, "ts": 0})
+        with patch.object(cal, "_fetch_thisweek", return_value=([], "timeout")):
+            events, err = cal.fetch_calendar()
+        self.assertIsNone(err)
+        self.assertEqual(events, parsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
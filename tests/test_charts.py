@@ -6,7 +6,7 @@ before importing so tests run in headless CI.
 
 import unittest
 import sys, os
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # ── Mock entire Tk dependency chain before any matplotlib backend import ──
 _TK_MODS = [
@@ -40,8 +40,8 @@ import pandas as pd
 import numpy as np
 
 from modules.charts import (
-    _bar_width, _compute_vol_colors, _setup_xaxis,
-    extract_risk_level, COLORS,
+    _bar_width, _compute_vol_colors, _setup_xaxis, _moving_average,
+    extract_risk_level, update_risk_gauge, COLORS,
 )
 
 
@@ -118,6 +118,62 @@ class TestVolColors(unittest.TestCase):
         self.assertEqual(len(colors), 500)
 
 
+class TestMovingAverage(unittest.TestCase):
+
+    def test_matches_pandas_rolling(self):
+        closes = _make_hist(120)["Close"]
+        expected = closes.rolling(20).mean().to_numpy()
+        np.testing.assert_allclose(_moving_average(closes.to_numpy(), 20),
+                                   expected, equal_nan=True)
+
+    def test_shorter_than_window_all_nan(self):
+        self.assertTrue(np.isnan(_moving_average([1.0, 2.0], 5)).all())
+
+
+class TestLttbIndices(unittest.TestCase):
+
+    def test_keeps_endpoints_and_peak(self):
+        from modules.charts import _lttb_indices
+        y = np.zeros(500)
+        y[237] = 10.0
+        idx = _lttb_indices(y, 50)
+        self.assertEqual(len(idx), 50)
+        self.assertEqual((idx[0], idx[-1]), (0, 499))
+        self.assertIn(237, idx)
+        self.assertTrue((np.diff(idx) > 0).all())
+
+    def test_short_series_untouched(self):
+        from modules.charts import _plot_selection
+        self.assertEqual(_plot_selection(np.arange(100.0)), slice(None))
+
+
+class TestVolumeCollection(unittest.TestCase):
+
+    def test_one_quad_per_bar(self):
+        from modules.charts import _volume_collection
+        hist = _make_hist(10)
+        coll = _volume_collection(hist.index, hist["Volume"].to_numpy(), 0.7,
+                                  _compute_vol_colors(hist))
+        paths = coll.get_paths()
+        self.assertEqual(len(paths), 10)
+        ys = paths[3].vertices[:, 1]
+        self.assertEqual(ys.max(), hist["Volume"].iloc[3])
+        self.assertEqual(ys.min(), 0)
+
+
+class TestTickFormatters(unittest.TestCase):
+
+    def test_vol_fmt(self):
+        from modules.charts import _vol_fmt
+        self.assertEqual([_vol_fmt(v, None) for v in (2.5e9, 3e6, 4500, 12)],
+                         ["2.5B", "3.0M", "4K", "12"])
+
+    def test_price_fmt(self):
+        from modules.charts import _price_fmt
+        self.assertEqual([_price_fmt(v, None) for v in (2e6, 1234.5, 1.5, 0.01)],
+                         ["2,000,000", "1,234.50", "1.5000", "0.010000"])
+
+
 class TestSetupXaxis(unittest.TestCase):
 
     def test_all_periods_no_crash(self):
@@ -149,5 +205,127 @@ class TestExtractRiskLevel(unittest.TestCase):
         self.assertEqual(extract_risk_level("No risk mentioned"), 5)
 
 
+class TestUpdateRiskGauge(unittest.TestCase):
+
+    def _captions(self, ax):
+        return [t.get_text() for t in ax.texts if t.get_text()]
+
+    def test_replaces_needle_and_caption(self):
+        from matplotlib.figure import Figure
+        from modules.charts import _draw_risk_indicator
+        fig = Figure()
+        ax = fig.add_subplot()
+        _draw_risk_indicator(ax, 2)
+        canvas = MagicMock(figure=fig)
+        self.assertEqual(self._captions(ax), ["2/10  NISKIE"])
+
+        update_risk_gauge(canvas, 9)
+        self.assertEqual(self._captions(ax), ["9/10  WYSOKIE"])
+        self.assertEqual(len(ax.texts), 2)   # needle + caption, no leftovers
+        canvas.draw_idle.assert_called_once()
+
+    def test_gauge_wedges_single_collection(self):
+        from matplotlib.figure import Figure
+        import modules.charts as charts
+        fig = Figure()
+        ax = fig.add_subplot()
+        with patch.object(charts.plt, "subplots", return_value=(fig, ax)):
+            charts.create_risk_gauge(MagicMock(), 5)
+        self.assertEqual(len(ax.collections), 1)
+        self.assertEqual(len(ax.collections[0].get_paths()), 3)
+
+
+class TestFetchCoingeckoChart(unittest.TestCase):
+
+    def _fetch(self, payload):
+        import modules.charts as charts
+        resp = MagicMock()
+        resp.json.return_value = payload
+        with patch.object(charts, "safe_get", return_value=resp):
+            return charts._fetch_coingecko_chart("bitcoin", 30)
+
+    def test_builds_ohlcv_frame(self):
+        df = self._fetch({
+            "prices": [[1_700_000_000_000, 10.0], [1_700_086_400_000, 12.0]],
+            "total_volumes": [[1_700_000_000_000, 5.0], [1_700_086_400_000, 6.0]],
+        })
+        self.assertEqual(list(df.columns), ["Close", "Volume", "Open"])
+        self.assertEqual(df.index[0], pd.Timestamp("2023-11-14 22:13:20"))
+        self.assertEqual(df["Open"].tolist(), [10.0, 10.0])
+        self.assertEqual(df["Volume"].tolist(), [5.0, 6.0])
+
+    def test_misaligned_volumes_matched_by_timestamp(self):
+        df = self._fetch({
+            "prices": [[1_000, 1.0], [2_000, 2.0]],
+            "total_volumes": [[2_000, 7.0]],
+        })
+        self.assertTrue(np.isnan(df["Volume"].iloc[0]))
+        self.assertEqual(df["Volume"].iloc[1], 7.0)
+
+    def test_no_prices(self):
+        self.assertTrue(self._fetch({"prices": []}).empty)
+
+
+class TestFetchChartDataCache(unittest.TestCase):
+
+    def setUp(self):
+        import modules.charts as charts
+        self.charts = charts
+        charts._chart_data_cache.clear()
+
+    def tearDown(self):
+        self.charts._chart_data_cache.clear()
+
+    def test_second_call_hits_cache(self):
+        with patch.object(self.charts, "_fetch_chart_data_uncached",
+                          return_value=_make_hist(5)) as mock_fetch:
+            first = self.charts.fetch_chart_data("AAPL", "1M")
+            first["Close"] = 0   # caller mutation must not leak into cache
+            second = self.charts.fetch_chart_data("AAPL", "1M")
+        mock_fetch.assert_called_once()
+        self.assertNotEqual(second["Close"].iloc[0], 0)
+
+    def test_intraday_expires_sooner(self):
+        import time
+        # Wpisy sprzed 100 s: świeże dla 1M, przeterminowane dla 1D
+        stamp = time.monotonic() - 100
+        for period in ("1M", "1D"):
+            self.charts._chart_data_cache[("AAPL", period, "yfinance")] = (
+                stamp, _make_hist(5))
+        with patch.object(self.charts, "_fetch_chart_data_uncached",
+                          return_value=_make_hist(5)) as mock_fetch:
+            self.charts.fetch_chart_data("AAPL", "1M")
+            self.charts.fetch_chart_data("AAPL", "1D")
+        mock_fetch.assert_called_once_with("AAPL", "1D", "yfinance")
+
+    def test_empty_result_not_cached(self):
+        with patch.object(self.charts, "_fetch_chart_data_uncached",
+                          return_value=pd.DataFrame()) as mock_fetch:
+            self.charts.fetch_chart_data("XYZ", "1M")
+            self.charts.fetch_chart_data("XYZ", "1M")
+        self.assertEqual(mock_fetch.call_count, 2)
+
+
+class TestCreatePriceChartReuse(unittest.TestCase):
+
+    def test_redraws_into_existing_canvas(self):
+        from matplotlib.figure import Figure
+        import modules.charts as charts
+        fig = Figure()
+        fig.add_subplot().plot([1, 2], [3, 4])
+        canvas = MagicMock(figure=fig)
+        with patch.object(charts, "fetch_chart_data",
+                          return_value=_make_hist(30)):
+            out_canvas, out_fig = charts.create_price_chart(
+                MagicMock(), "AAPL", "1M", canvas=canvas)
+        self.assertIs(out_canvas, canvas)
+        self.assertIs(out_fig, fig)
+        self.assertEqual(len(fig.axes), 2)   # price + volume, old axes gone
+        canvas.draw_idle.assert_called_once()
+        canvas.toolbar.update.assert_called_once()
+        last = _make_hist(30)["Close"].iloc[-1]
+        self.assertEqual(fig.axes[0].get_title(), f"AAPL  ·  {last:,.2f}  ·  1M")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for daemon_pool — daemon workers, results and shutdown."""
+
+import threading
+import unittest
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.daemon_pool import DaemonThreadPool
+
+
+class TestDaemonThreadPool(unittest.TestCase):
+
+    def test_workers_are_daemon(self):
+        with DaemonThreadPool(max_workers=2, thread_name_prefix="t") as pool:
+            f = pool.submit(lambda: (threading.current_thread().daemon,
+                                     threading.current_thread().name))
+            daemon, name = f.result(timeout=5)
+        self.assertTrue(daemon)
+        self.assertTrue(name.startswith("t_"))
+
+    def test_map_keeps_order_and_reraises(self):
+        with DaemonThreadPool(max_workers=3) as pool:
+            self.assertEqual(list(pool.map(lambda x: x * x, range(6))),
+                             [0, 1, 4, 9, 16, 25])
+            f = pool.submit(lambda: 1 / 0)
+            with self.assertRaises(ZeroDivisionError):
+                f.result(timeout=5)
+
+    def test_caps_worker_count(self):
+        release = threading.Event()
+        with DaemonThreadPool(max_workers=2) as pool:
+            futures = [pool.submit(release.wait, 5) for _ in range(6)]
+            self.assertEqual(len(pool._threads), 2)
+            release.set()
+            self.assertTrue(all(f.result(timeout=5) for f in futures))
+
+    def test_shutdown_cancels_queued_without_waiting(self):
+        pool = DaemonThreadPool(max_workers=1)
+        started, release = threading.Event(), threading.Event()
+
+        def _block():
+            started.set()
+            return release.wait(5)
+        running = pool.submit(_block)
+        self.assertTrue(started.wait(5))
+        queued = pool.submit(lambda: "never")
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        self.assertFalse(running.done())
+        with self.assertRaises(RuntimeError):
+            pool.submit(lambda: None)
+        release.set()
+        self.assertTrue(running.result(timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
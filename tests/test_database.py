@@ -5,6 +5,7 @@ import sys, os
 import sqlite3
 import tempfile
 import shutil
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
@@ -86,15 +87,35 @@ class TestReports(_TempDBMixin, unittest.TestCase):
 
     def test_delete_report(self):
         rid = db.save_report("a", "m", "s", "del")
-        db.delete_report(rid)
+        self.assertEqual(db.delete_report(rid), rid)
         self.assertIsNone(db.get_report_by_id(rid))
 
+    def test_delete_report_missing(self):
+        self.assertIsNone(db.delete_report(12345))
+
     def test_get_reports_limit(self):
         for i in range(5):
             db.save_report("p", "m", "s", f"a{i}")
         rows = db.get_reports(limit=3)
         self.assertEqual(len(rows), 3)
 
+    def test_get_history_rows_preformatted(self):
+        rid = db.save_report("anthropic", "claude-opus-4-6", "s", "a", 7)
+        rows = db.get_history_rows(limit=10)
+        self.assertEqual(len(rows), 1)
+        row_id, created, prov_model, risk, provider, model = rows[0]
+        self.assertEqual(row_id, rid)
+        self.assertEqual(len(created), 16)
+        self.assertEqual(prov_model, "anthropic/claude-opus-4-6")
+        self.assertEqual(risk, "7/10")
+        self.assertEqual(provider, "anthropic")
+        self.assertEqual(model, "claude-opus-4-6")
+
+    def test_get_report_analysis(self):
+        rid = db.save_report("p", "m", "summary", "full analysis", 3, 10, 20)
+        self.assertEqual(db.get_report_analysis(rid), ("full analysis", 10, 20))
+        self.assertIsNone(db.get_report_analysis(rid + 1))
+
     def test_save_report_none_tokens(self):
         rid = db.save_report("p", "m", "s", "a", 0,
                              input_tokens=None, output_tokens=None)
@@ -145,6 +166,31 @@ class TestAlerts(_TempDBMixin, unittest.TestCase):
     def test_no_unseen_initially(self):
         self.assertEqual(len(db.get_unseen_alerts()), 0)
 
+    def test_cache_invalidated_by_writes(self):
+        db.add_alert("AAPL", "a")
+        self.assertEqual(len(db.get_unseen_alerts()), 1)
+        db.add_alert("BTC", "b")
+        self.assertEqual(len(db.get_unseen_alerts()), 2)
+        db.mark_alerts_seen()
+        self.assertEqual(db.get_unseen_alerts(), [])
+
+    @patch("modules.database.time.monotonic", return_value=1000.0)
+    def test_repeated_reads_hit_cache(self, _):
+        db.add_alert("AAPL", "a")
+        db.get_unseen_alerts()
+        with patch.object(db, "_connect", side_effect=AssertionError("DB hit")):
+            self.assertEqual(len(db.get_unseen_alerts()), 1)
+
+    def test_listener_notified_after_insert(self):
+        seen = []
+        listener = lambda: seen.append(len(db.get_unseen_alerts()))
+        db.add_alert_listener(listener)
+        try:
+            db.add_alert("AAPL", "x")
+        finally:
+            db._alert_listeners.remove(listener)
+        self.assertEqual(seen, [1])
+
 
 class TestPortfolio(_TempDBMixin, unittest.TestCase):
 
@@ -198,6 +244,16 @@ class TestInstrumentProfiles(_TempDBMixin, unittest.TestCase):
         self.assertIsNone(db.get_instrument_profile("NONE"))
 
 
+class TestProfileBatches(_TempDBMixin, unittest.TestCase):
+
+    def test_save_get_delete(self):
+        db.save_profile_batch("msgbatch_1", ["^GSPC", "EURUSD=X"])
+        self.assertEqual(db.get_profile_batches(),
+                         [("msgbatch_1", ["^GSPC", "EURUSD=X"])])
+        db.delete_profile_batch("msgbatch_1")
+        self.assertEqual(db.get_profile_batches(), [])
+
+
 class TestMigrations(_TempDBMixin, unittest.TestCase):
 
     def test_migrate_reports_usage_idempotent(self):
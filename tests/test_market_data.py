@@ -220,6 +220,15 @@ class TestGetFxToUsd(unittest.TestCase):
 
         self.assertIsNone(md.get_fx_to_usd("GBP"))
 
+    @patch("modules.market_data.yf")
+    def test_failure_cached_briefly(self, mock_yf):
+        import requests
+        mock_yf.Ticker.side_effect = requests.ConnectionError("network")
+
+        self.assertIsNone(md.get_fx_to_usd("CHF"))
+        self.assertIsNone(md.get_fx_to_usd("CHF"))
+        mock_yf.Ticker.assert_called_once()
+
 
 class TestGetAllInstruments(unittest.TestCase):
 
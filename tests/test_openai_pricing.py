@@ -0,0 +1,55 @@
+"""Tests for openai_pricing.py — cost calculation and memoized rate lookup."""
+
+import unittest
+import sys, os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import modules.openai_pricing as pricing
+
+
+class _FixedPricingMixin:
+    """Install a fixed in-memory pricing table for each test."""
+
+    def setUp(self):
+        pricing._store_pricing({
+            "gpt-4o": {"input": 2.50, "output": 10.00},
+            "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        })
+
+    def tearDown(self):
+        with pricing._pricing_lock:
+            pricing._pricing, pricing._pricing_ts = None, 0.0
+        pricing._get_model_rates.cache_clear()
+
+
+class TestGetModelCost(_FixedPricingMixin, unittest.TestCase):
+
+    def test_exact_model(self):
+        cost = pricing.get_model_cost("gpt-4o", 1_000_000, 1_000_000)
+        self.assertAlmostEqual(cost, 12.50)
+
+    def test_provider_prefix_stripped(self):
+        cost = pricing.get_model_cost("openai/gpt-4o-mini", 1_000_000, 0)
+        self.assertAlmostEqual(cost, 0.15)
+
+    def test_longest_prefix_match(self):
+        cost = pricing.get_model_cost("gpt-4o-mini-2024-07-18", 0, 1_000_000)
+        self.assertAlmostEqual(cost, 0.60)
+
+    def test_unknown_model(self):
+        self.assertIsNone(pricing.get_model_cost("mystery-model", 10, 10))
+
+
+class TestRatesCacheInvalidation(_FixedPricingMixin, unittest.TestCase):
+
+    def test_new_pricing_clears_memoized_rates(self):
+        self.assertAlmostEqual(
+            pricing.get_model_cost("gpt-4o", 1_000_000, 0), 2.50)
+        pricing._store_pricing({"gpt-4o": {"input": 5.00, "output": 20.00}})
+        self.assertAlmostEqual(
+            pricing.get_model_cost("gpt-4o", 1_000_000, 0), 5.00)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,8 +22,11 @@ class FakeTextWidget:
         self.tag_bindings = {}
         self._cursor = ""
 
-    def insert(self, pos, text, tags=None):
+    def insert(self, pos, text, tags=None, *more):
+        # Tk accepts extra (chars, tags) pairs in a single call
         self.inserts.append((pos, text, tags))
+        for i in range(0, len(more), 2):
+            self.inserts.append((pos, more[i], more[i + 1]))
 
     def tag_configure(self, tag_name, **kwargs):
         self.tags_configured[tag_name] = kwargs
@@ -166,6 +169,31 @@ class TestInsertMarkdown(unittest.TestCase):
         self.assertIn("item", text)
         self.assertIn("code", text)
 
+    def test_parse_cached_across_widgets(self):
+        from modules.ui_helpers import insert_markdown, _parse_markdown
+        content = "# Cached\n\nSame **report** twice"
+        w1, w2 = FakeTextWidget(), FakeTextWidget()
+        insert_markdown(w1, content)
+        hits = _parse_markdown.cache_info().hits
+        insert_markdown(w2, content, base_tag="assistant")
+        self.assertEqual(_parse_markdown.cache_info().hits, hits + 1)
+        self.assertEqual(w1.get_all_text(), w2.get_all_text())
+        self.assertTrue(all("assistant" in tags for _, _, tags in w2.inserts))
+
+
+    def test_plain_text_single_insert(self):
+        from modules.ui_helpers import insert_markdown
+        w = FakeTextWidget()
+        insert_markdown(w, "line one\nline two", base_tag="assistant")
+        self.assertEqual(w.inserts,
+                         [("end", "line one\nline two\n", ("assistant",))])
+
+    def test_same_tag_segments_merged(self):
+        from modules.ui_helpers import _parse_markdown
+        ops = _parse_markdown("# Head\nplain **b** tail\nnext")
+        self.assertEqual(ops[0], ("Head\n", ("md_h1",), None))
+        self.assertEqual(ops[-1], (" tail\nnext\n", (), None))
+
 
 class TestOverlaps(unittest.TestCase):
 
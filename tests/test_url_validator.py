@@ -190,6 +190,13 @@ class TestValidateUrls(unittest.TestCase):
         self.assertLessEqual(len(valid), 3)
         self.assertTrue(any("limit" in e.lower() for e in errors))
 
+    @patch("modules.url_validator.socket.getaddrinfo", side_effect=_mock_public_dns)
+    def test_preserves_input_order(self, _):
+        urls = [f"https://reuters.com/{i}" for i in range(10)]
+        valid, errors = validate_urls(urls, ["reuters.com"])
+        self.assertEqual(valid, urls)
+        self.assertEqual(errors, [])
+
     def test_empty_list(self):
         valid, errors = validate_urls([])
         self.assertEqual(valid, [])